@@ -0,0 +1,132 @@
+"""
+Spatial-grid crowd density analysis.
+
+Person centroids are binned into a uniform grid with cell size r / sqrt(2),
+where r is the neighbour radius. Points that share a cell are always within
+r of each other, so they are linked directly in O(N). Only points in nearby
+cells (at most 2 cells away) are compared, found with binary search over the
+sorted cell keys. Cross-cell checks use at most MAX_POINTS_PER_CELL points
+per cell. That bounds the cost when everyone stands in one blob, and it is
+exact unless a single cell holds more people than that. The resulting
+graph's connected components are the crowds.
+Everything is vectorized with numpy (see benchmarks/density.py for timings).
+
+The radius scales with the median person height, so "close together" adapts
+to how far the camera is from the scene.
+"""
+import os
+
+import numpy as np
+
+CROWD_RADIUS_FACTOR = float(os.getenv("CROWD_RADIUS_FACTOR", 0.75))   # x median person height
+MAX_POINTS_PER_CELL = 16          # cross-cell candidates per cell (bounds the worst case)
+
+# half of the 5x5 neighbourhood: every unordered pair of nearby cells is visited once
+_HALF_NEIGHBOURS = ((0, 1), (0, 2)) + tuple((dx, dy) for dx in (1, 2) for dy in (-2, -1, 0, 1, 2))
+
+
+def _expand(lo, counts):
+    """Row index and flat positions for ranges [lo, lo + counts) per row."""
+    total = counts.sum()
+    rows = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, np.repeat(lo, counts) + within
+
+
+def neighbor_pairs(points, radius, max_per_cell=MAX_POINTS_PER_CELL):
+    """
+    Edges (i, j) whose connected components equal those of the radius graph.
+
+    Same-cell points are joined to their cell's first point; cross-cell edges
+    are exact distance checks between (up to max_per_cell) points per cell.
+    """
+    n = len(points)
+    empty = np.zeros(0, dtype=np.int64)
+    if n < 2 or radius <= 0:
+        return empty, empty
+
+    cells = np.floor(points / (radius / np.sqrt(2))).astype(np.int64)
+    cells -= cells.min(axis=0) - 2            # keep y +/- 2 inside its column
+    stride = cells[:, 1].max() + 3
+    keys = cells[:, 0] * stride + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    # same cell: star edges to the first point of each run
+    run_start = np.searchsorted(sorted_keys, sorted_keys, "left")
+    rank = np.arange(n) - run_start
+    pi = [order[run_start[rank > 0]]]
+    pj = [order[rank > 0]]
+
+    # nearby cells: exact checks between capped candidate sets
+    sample = rank < max_per_cell
+    cand, cand_keys = order[sample], sorted_keys[sample]
+    r2 = radius * radius
+    for dx, dy in _HALF_NEIGHBOURS:
+        target = cand_keys + dx * stride + dy
+        lo = np.searchsorted(cand_keys, target, "left")
+        counts = np.searchsorted(cand_keys, target, "right") - lo
+        if not counts.any():
+            continue
+        rows, pos = _expand(lo, counts)
+        i, j = cand[rows], cand[pos]
+        d = points[i] - points[j]
+        keep = np.einsum("ij,ij->i", d, d) <= r2
+        pi.append(i[keep])
+        pj.append(j[keep])
+
+    return np.concatenate(pi), np.concatenate(pj)
+
+
+def connected_labels(n, i, j):
+    """Connected-component label per node (min-label propagation with pointer jumping)."""
+    labels = np.arange(n)
+    if not len(i):
+        return labels
+    while True:
+        m = np.minimum(labels[i], labels[j])
+        new = labels.copy()
+        np.minimum.at(new, i, m)
+        np.minimum.at(new, j, m)
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def find_clusters(boxes, frame_shape, radius_factor=CROWD_RADIUS_FACTOR, min_size=2):
+    """
+    Group person boxes (N, 4 xyxy) into crowds.
+
+    Returns a list of dicts sorted by size (largest first) with the member
+    count, centroid, bounding box of the members and its share of the frame.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    n = len(boxes)
+    if n < min_size:
+        return []
+
+    centroids = (boxes[:, :2] + boxes[:, 2:]) / 2
+    heights = boxes[:, 3] - boxes[:, 1]
+    radius = radius_factor * float(np.median(heights))
+
+    i, j = neighbor_pairs(centroids, radius)
+    labels = connected_labels(n, i, j)
+    _, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+
+    h, w = frame_shape[:2]
+    frame_area = float(h * w)
+    clusters = []
+    for c in np.flatnonzero(sizes >= min_size):
+        members = boxes[inverse == c]
+        x1, y1 = members[:, :2].min(axis=0)
+        x2, y2 = members[:, 2:].max(axis=0)
+        cx, cy = centroids[inverse == c].mean(axis=0)
+        clusters.append({
+            "size": int(sizes[c]),
+            "center": [round(float(cx), 1), round(float(cy), 1)],
+            "bbox": [int(x1), int(y1), int(x2), int(y2)],
+            "area_ratio": round(max(1.0, float((x2 - x1) * (y2 - y1))) / frame_area, 4),
+        })
+    clusters.sort(key=lambda c: c["size"], reverse=True)
+    return clusters
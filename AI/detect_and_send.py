@@ -3,47 +3,71 @@ import os
 import cv2
 import time
 import json
-import base64
 import hashlib
 import requests
+import threading
+import uuid
 from collections import deque
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from ultralytics import YOLO
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import numpy as np
-import mediapipe as mp
+from AI.inference import get_detector
+from AI.temporal import EventRule, EventScorer
+from AI.density import find_clusters
+from common import metrics
+from common.keys import load_aes_key
 
 # Load env
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 CAMERA_ID = os.getenv("CAMERA_ID", "cam1")
-AES_KEY_B64 = os.getenv("AES_KEY")  # base64 encoded 32-byte key
 BUFFER_SECONDS = float(os.getenv("BUFFER_SECONDS", 8))
 COOLDOWN_SECONDS = float(os.getenv("COOLDOWN_SECONDS", 30))
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9101))  # detector /metrics exporter, 0 = off
+FRAME_QUEUE_SIZE = int(os.getenv("FRAME_QUEUE_SIZE", 2))  # live frames waiting for detection
 
-if AES_KEY_B64 is None:
-    raise RuntimeError("Set AES_KEY in .env (base64 encoded 256-bit key).")
-
-AES_KEY = base64.b64decode(AES_KEY_B64)
+AES_KEY = load_aes_key()
 
 # Parameters
 FPS = 20                          # fallback fps if camera doesn't provide
 BUFFER_SIZE = int(BUFFER_SECONDS * FPS)
-PERSON_CLASS_ID = 0               # COCO person class
 MELEE_MIN_PERSONS = 2
 MELEE_SPEED_THRESHOLD = 12.0      # pixels/frame (tune per camera)
 MOB_MIN_PERSONS = 5
-MOB_AREA_RATIO_THRESHOLD = 0.2    # cluster area ratio (tune)
+MOB_AREA_RATIO_THRESHOLD = 0.2    # per-crowd area ratio, see AI/density.py (tune)
 COOLDOWN = COOLDOWN_SECONDS
 
+# Windowed event scoring (AI/temporal.py): decisions use the mean of each
+# signal over the last EVENT_WINDOW_SECONDS; an event re-arms only after its
+# score drops below enter * HYSTERESIS_EXIT_RATIO. Cooldowns are per type.
+EVENT_WINDOW_SECONDS = float(os.getenv("EVENT_WINDOW_SECONDS", 2.0))
+HYSTERESIS_EXIT_RATIO = float(os.getenv("HYSTERESIS_EXIT_RATIO", 0.6))
+MOB_WINDOW_FRACTION = 0.6         # share of window frames with a compact crowd
+POSE_WINDOW_FRACTION = 0.5        # share of window frames with a raised-arm pose
+MOB_COOLDOWN = float(os.getenv("MOB_COOLDOWN_SECONDS", COOLDOWN))
+MELEE_COOLDOWN = float(os.getenv("MELEE_COOLDOWN_SECONDS", COOLDOWN))
+POSE_COOLDOWN = float(os.getenv("POSE_COOLDOWN_SECONDS", COOLDOWN))
+
 STORAGE_DIR = os.path.join(os.path.dirname(__file__), '..', 'storage')
 os.makedirs(STORAGE_DIR, exist_ok=True)
 
-# init YOLO and Mediapipe
-model = YOLO("yolov8n.pt")  # will download if not present
-mp_pose = mp.solutions.pose
-pose_detector = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+# YOLO (AI.inference.get_detector) and Mediapipe are loaded lazily on first use
+_pose_detector = None
+_pose_lock = threading.Lock()
+
+def create_pose_detector():
+    """A new MediaPipe Pose graph; it tracks across frames, so use one per stream."""
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+
+def get_pose_detector():
+    global _pose_detector
+    if _pose_detector is None:
+        with _pose_lock:
+            if _pose_detector is None:
+                _pose_detector = create_pose_detector()
+    return _pose_detector
 
 # helper functions
 def save_clip(frames, path, fps=FPS):
@@ -55,6 +79,7 @@ def save_clip(frames, path, fps=FPS):
     out.release()
 
 def encrypt_file(in_path, out_path, key=AES_KEY):
+    t0 = time.perf_counter()
     aesgcm = AESGCM(key)
     nonce = os.urandom(12)
     with open(in_path, "rb") as f:
@@ -62,15 +87,22 @@ def encrypt_file(in_path, out_path, key=AES_KEY):
     ciphertext = aesgcm.encrypt(nonce, plaintext, None)
     with open(out_path, "wb") as f:
         f.write(nonce + ciphertext)   # store nonce + ciphertext
+    metrics.ENCRYPT_SECONDS.inc(time.perf_counter() - t0)
+    metrics.ENCRYPT_BYTES.inc(len(plaintext))
     return out_path
 
 def compute_sha256_file(path):
+    t0 = time.perf_counter()
     h = hashlib.sha256()
+    size = 0
     with open(path, "rb") as f:
         while True:
             data = f.read(65536)
             if not data: break
             h.update(data)
+            size += len(data)
+    metrics.HASH_SECONDS.inc(time.perf_counter() - t0)
+    metrics.HASH_BYTES.inc(size)
     return h.hexdigest()
 
 def is_valid_hex(s):
@@ -92,145 +124,417 @@ def post_event(payload):
     token = os.getenv("ACCESS_TOKEN")
     headers = {"Authorization": f"Bearer {token}"} if token else {}
 
+    t0 = time.perf_counter()
     try:
         resp = requests.post(f"{BACKEND_URL}/event", json=payload, headers=headers, timeout=10)
         return resp.status_code, resp.text
     except Exception as e:
         return None, str(e)
+    finally:
+        metrics.EVENT_POST_SECONDS.observe(time.perf_counter() - t0)
+
+
+# per-frame stages (also timed individually by benchmarks/pipeline.py)
+def person_features(boxes, last_centroids):
+    """Person boxes, centroids and mean centroid speed vs. the previous frame."""
+    persons = []
+    centroids = []
+    for x1, y1, x2, y2 in boxes.astype(int).tolist():
+        cx = int((x1 + x2) / 2)
+        cy = int((y1 + y2) / 2)
+        persons.append((x1, y1, x2, y2))
+        centroids.append((cx, cy))
+
+    speeds = []
+    for i, c in enumerate(centroids):
+        if i in last_centroids:
+            px, py = last_centroids[i]
+            dist = np.linalg.norm(np.array([c[0]-px, c[1]-py]))
+            speeds.append(dist)
+    avg_speed = float(np.mean(speeds)) if speeds else 0.0
+    return persons, centroids, avg_speed
+
+def mob_clusters(persons, frame_shape):
+    """Crowds of at least MOB_MIN_PERSONS packed into a small part of the frame."""
+    if len(persons) < MOB_MIN_PERSONS:
+        return []
+    return [c for c in find_clusters(persons, frame_shape, min_size=MOB_MIN_PERSONS)
+            if c["area_ratio"] < MOB_AREA_RATIO_THRESHOLD]
+
+def melee_speed(persons, avg_speed):
+    """Speed signal for melee scoring; 0 unless enough people are in view."""
+    return avg_speed if len(persons) >= MELEE_MIN_PERSONS else 0.0
+
+def build_event_rules():
+    """Event rules in priority order (mob > melee > pose, as before)."""
+    r = HYSTERESIS_EXIT_RATIO
+    return [
+        EventRule("mob_formation", "mob", MOB_WINDOW_FRACTION, MOB_WINDOW_FRACTION * r, MOB_COOLDOWN, 0.8),
+        EventRule("melee", "speed", MELEE_SPEED_THRESHOLD, MELEE_SPEED_THRESHOLD * r, MELEE_COOLDOWN, 0.9),
+        EventRule("suspicious_body_language", "pose", POSE_WINDOW_FRACTION, POSE_WINDOW_FRACTION * r, POSE_COOLDOWN, 0.6),
+    ]
+
+def detect_suspicious_pose(pose_detector, frame):
+    """True if a detected pose has a wrist raised above its shoulder."""
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    res = pose_detector.process(rgb)
+    if res.pose_landmarks:
+        lm = res.pose_landmarks.landmark
+        lw = lm[15]; rw = lm[16]; ls = lm[11]; rs = lm[12]
+        return lw.y < ls.y or rw.y < rs.y
+    return False
+
+def emit_event(frames, event_type, event_confidence, fps=FPS, camera_id=CAMERA_ID, start_ts=None, end_ts=None):
+    """
+    Save, encrypt, hash and post one event clip; returns the payload.
+
+    start_ts / end_ts are the times of the first and last buffered frame
+    (footage time for recorded files); by default the clip ends now.
+    """
+    end_ts = end_ts or datetime.utcnow()
+    start_ts = start_ts or end_ts - timedelta(seconds=len(frames) / fps)
+    # unique even when replays fire the same type within one second: an
+    # overwritten clip would no longer match the hash already on-chain
+    ts = end_ts.strftime("%Y%m%d_%H%M%S")
+    clip_name = f"{camera_id}_{event_type}_{ts}_{uuid.uuid4().hex[:8]}.mp4"
+    clip_path = os.path.join(STORAGE_DIR, clip_name)
+    save_clip(frames, clip_path, fps=fps)
+    print(f"[EVENT] {event_type} detected. Saved clip: {clip_path}")
+
+    # Encrypt clip
+    enc_name = clip_name + ".enc"
+    enc_path = os.path.join(STORAGE_DIR, enc_name)
+    encrypt_file(clip_path, enc_path)
+    print(f"Encrypted -> {enc_path}")
+
+    # Compute SHA256 hash
+    hash_hex = compute_sha256_file(enc_path)
+    print(f"SHA256 (encrypted): {hash_hex}")
+
+    # Post metadata
+    payload = {
+        "camera_id": camera_id,
+        "event_type": event_type,
+        "confidence": event_confidence,
+        "start_time": start_ts.isoformat(),
+        "end_time": end_ts.isoformat(),
+        "clip_path": clip_path,
+        "enc_path": enc_path,
+        "hash": hash_hex
+    }
+    status, resp_text = post_event(payload)
+    print("POST /event ->", status, resp_text)
+    metrics.EVENTS.labels(camera_id, event_type).inc()
+    return payload
+
+
+# sources
+VIDEO_EXTS = (".mp4", ".avi", ".mkv", ".mov", ".m4v", ".webm")
+
+def expand_sources(specs):
+    """
+    Camera indices, stream URLs, video files and directories of clips -> (camera_id, source).
+
+    A spec may be prefixed with its camera id, e.g. lobby=rtsp://cam1/stream.
+    Without one, files use CAMERA_ID, a single live source too, and several
+    unnamed live sources get CAMERA_ID_0, CAMERA_ID_1, ...
+    """
+    sources = []
+    for spec in specs:
+        spec = str(spec)
+        label, _, rest = spec.partition("=")
+        if rest and label.isidentifier():
+            spec = rest
+        else:
+            label = None
+        if spec.isdigit():
+            sources.append((label, int(spec)))
+        elif "://" in spec:
+            sources.append((label, spec))         # rtsp://, http://, ...
+        elif os.path.isdir(spec):
+            sources.extend((label, os.path.join(spec, f)) for f in sorted(os.listdir(spec))
+                           if f.lower().endswith(VIDEO_EXTS))
+        elif os.path.isfile(spec):
+            sources.append((label, spec))
+        else:
+            print(f"[WARN] Skipping unknown source: {spec}")
+
+    unnamed = [i for i, (label, source) in enumerate(sources) if label is None and not is_file_source(source)]
+    for n, i in enumerate(unnamed):
+        sources[i] = (CAMERA_ID if len(unnamed) == 1 else f"{CAMERA_ID}_{n}", sources[i][1])
+    return [(label or CAMERA_ID, source) for label, source in sources]
+
+def is_file_source(source):
+    return isinstance(source, str) and "://" not in source
+
+def footage_origin(path, frame_count, fps):
+    """Wall-clock time of a recording's first frame, assuming the file was last written when it ended."""
+    return datetime.utcfromtimestamp(os.path.getmtime(path)) - timedelta(seconds=frame_count / fps)
+
+
+class LiveCapture:
+    """
+    Reads a live source on its own thread into a short queue.
+
+    When detection falls behind, the oldest queued frame is dropped (and
+    counted) instead of letting the capture lag further behind real time.
+    """
+
+    def __init__(self, cap, camera, maxlen=FRAME_QUEUE_SIZE, stop=None):
+        self.cap = cap
+        self.frames = deque(maxlen=max(1, maxlen))
+        self.cond = threading.Condition()
+        self.ended = False
+        self.stopped = False
+        self.stop = stop or threading.Event()      # shared shutdown flag
+        self.dropped = metrics.DROPPED_FRAMES.labels(camera)
+        self.depth = metrics.QUEUE_DEPTH.labels(camera, "capture")
+        self.thread = threading.Thread(target=self._run, name=f"capture-{camera}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not (self.stopped or self.stop.is_set()):
+            ret, frame = self.cap.read()
+            with self.cond:
+                if not ret:
+                    self.ended = True
+                    self.cond.notify()
+                    return
+                if len(self.frames) == self.frames.maxlen:
+                    self.dropped.inc()
+                self.frames.append(frame)
+                self.depth.set(len(self.frames))
+                self.cond.notify()
+
+    def read(self):
+        with self.cond:
+            while not self.frames and not self.ended and not self.stop.is_set():
+                self.cond.wait(0.5)
+            if not self.frames:
+                return False, None
+            frame = self.frames.popleft()
+            self.depth.set(len(self.frames))
+            return True, frame
+
+    def release(self):
+        self.stopped = True
+        self.thread.join(timeout=2)
+        if not self.thread.is_alive():     # never release under a blocked read()
+            self.cap.release()
+
+
+class JsonlWriter:
+    """Appends one JSON object per line; a no-op when path is None."""
+
+    def __init__(self, path=None, events_only=False):
+        self.f = open(path, "a", buffering=1 << 16) if path else None
+        self.events_only = events_only
+        self._lock = threading.Lock()     # shared by the per-source threads
+
+    def _write(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self.f.write(line)
+
+    def detection(self, **record):
+        if self.f and not self.events_only:
+            self._write({"type": "detection", **record})
+
+    def event(self, **record):
+        if self.f:
+            self._write({"type": "event", **record})
+
+    def close(self):
+        if self.f:
+            self.f.close()
 
 
 # main loop
-def main(camera_source=0, device='cpu'):
-    cap = cv2.VideoCapture(camera_source)
+def process_source(source, detector, pose_detector, out, camera_id=CAMERA_ID, max_speed=False, sink=True,
+                   stop=None, preview=None):
+    """
+    Run detection over one source until it ends or `stop` is set.
+
+    Annotated frames are handed to the main thread through `preview`
+    ({camera_id: frame}); OpenCV windows must only be driven from there.
+    """
+    stop = stop or threading.Event()
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"[WARN] Cannot open source: {source}")
+        return
     cam_fps = cap.get(cv2.CAP_PROP_FPS) or 0
     if cam_fps > 0:
         fps = int(cam_fps)
     else:
         fps = FPS
 
+    # recorded footage runs on media time so cooldowns and pacing don't depend on wall clock
+    from_file = is_file_source(source)
+    source_name = str(source)
+    if from_file:
+        origin = footage_origin(source, cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0, fps)
+        to_datetime = lambda t: origin + timedelta(seconds=t)
+    else:
+        to_datetime = datetime.utcfromtimestamp
+    if not from_file:
+        cap = LiveCapture(cap, camera_id, stop=stop)
+
     buf = deque(maxlen=BUFFER_SIZE)
+    buf_times = deque(maxlen=BUFFER_SIZE)   # stream time of each buffered frame
     last_centroids = {}   # id => (x,y)
-    last_event_time = 0
+    scorer = EventScorer(build_event_rules(), window_seconds=EVENT_WINDOW_SECONDS)
+
+    # metric children are resolved once, outside the hot loop
+    frames_total = metrics.FRAMES.labels(camera_id)
+    fps_gauge = metrics.CAMERA_FPS.labels(camera_id)
+    inference_seconds = metrics.INFERENCE_SECONDS.labels(camera_id, detector.name)
+    fps_window_start, fps_window_frames = time.perf_counter(), 0
 
-    print("Starting detection. Press 'q' to quit.")
+    print(f"[{camera_id}] Starting detection on {source_name}.")
+    replay_start = time.perf_counter()
     frame_idx = 0
-    while True:
+    while not stop.is_set():
         ret, frame = cap.read()
         if not ret:
-            print("Frame read failed, exiting.")
+            if not from_file and not stop.is_set():
+                print(f"[{camera_id}] Frame read failed, exiting.")
             break
         frame_idx += 1
-        buf.append(frame.copy())
-
-        # Run YOLO (every frame)
-        results = model(frame, imgsz=640, device=device)[0]  # CPU/GPU inference
-        boxes = results.boxes
-        persons = []
-        centroids = []
-
-        for box in boxes:
-            cls = int(box.cls[0])
-            if cls == PERSON_CLASS_ID:
-                x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
-                cx = int((x1 + x2) / 2)
-                cy = int((y1 + y2) / 2)
-                persons.append((x1, y1, x2, y2))
-                centroids.append((cx, cy))
+        now = frame_idx / fps if from_file else time.time()
+        # the buffer only needs its own copy when boxes get drawn onto the frame
+        buf.append(frame if preview is None else frame.copy())
+        buf_times.append(now)
+        frames_total.inc()
+
+        fps_window_frames += 1
+        elapsed = time.perf_counter() - fps_window_start
+        if elapsed >= 1.0:
+            fps_gauge.set(fps_window_frames / elapsed)
+            fps_window_start, fps_window_frames = time.perf_counter(), 0
+
+        # Run YOLO (every frame); the backend only returns person boxes
+        t0 = time.perf_counter()
+        boxes, scores = detector.detect(frame)
+        inference_seconds.observe(time.perf_counter() - t0)
+        persons, centroids, avg_speed = person_features(boxes, last_centroids)
+
+        crowds = mob_clusters(persons, frame.shape)
+        suspicious_pose = bool(persons) and detect_suspicious_pose(pose_detector, frame)
+        last_centroids = {i: c for i, c in enumerate(centroids)}
+
+        # windowed scoring with per-type hysteresis and cooldowns
+        fired = scorer.update(now, len(persons), melee_speed(persons, avg_speed), bool(crowds), suspicious_pose)
+
+        out.detection(camera_id=camera_id, source=source_name, frame=frame_idx, t=now,
+                      boxes=boxes.astype(float).round(1).tolist(), scores=scores.astype(float).round(3).tolist(),
+                      avg_speed=avg_speed, crowds=crowds, pose=suspicious_pose)
+
+        # the scorer has already marked every fired type as handled, so each one gets
+        # its own clip, chain entry and record (from the same buffer snapshot)
+        if fired:
+            frames = list(buf)
+            window = scorer.snapshot()
+            span = buf_times[-1] - buf_times[0]
+            # live buffers skip dropped frames: play the clip back at the rate it was captured
+            clip_fps = (len(frames) - 1) / span if span > 0 else fps
+            start_ts, end_ts = to_datetime(buf_times[0]), to_datetime(buf_times[-1])
+            for event_type, event_confidence, score in fired:
+                payload = emit_event(frames, event_type, event_confidence, fps=clip_fps, camera_id=camera_id,
+                                     start_ts=start_ts, end_ts=end_ts) if sink else {
+                    "camera_id": camera_id, "event_type": event_type, "confidence": event_confidence}
+                out.event(source=source_name, frame=frame_idx, t=now, score=score,
+                          window=window, crowds=crowds, **payload)
+
+        if preview is not None:
+            for x1, y1, x2, y2 in persons:
                 cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
+            preview[camera_id] = frame
 
-        # compute speeds
-        speeds = []
-        for i, c in enumerate(centroids):
-            if i in last_centroids:
-                px, py = last_centroids[i]
-                dist = np.linalg.norm(np.array([c[0]-px, c[1]-py]))
-                speeds.append(dist)
-        avg_speed = float(np.mean(speeds)) if speeds else 0.0
-
-        # crowd / mob detection
-        event_type = None
-        event_confidence = 0.0
-        now = time.time()
-        P = len(persons)
-        h, w = frame.shape[:2]
-        frame_area = h * w
-
-        if P >= MOB_MIN_PERSONS:
-            xs = [p[0] for p in persons] + [p[2] for p in persons]
-            ys = [p[1] for p in persons] + [p[3] for p in persons]
-            minx, maxx = min(xs), max(xs)
-            miny, maxy = min(ys), max(ys)
-            cluster_area = max(1, (maxx-minx)*(maxy-miny))
-            area_ratio = cluster_area / frame_area
-            if area_ratio < MOB_AREA_RATIO_THRESHOLD:
-                event_type = "mob_formation"
-                event_confidence = 0.8
-
-        # melee detection
-        if event_type is None and P >= MELEE_MIN_PERSONS:
-            if avg_speed > MELEE_SPEED_THRESHOLD:
-                event_type = "melee"
-                event_confidence = 0.9
-
-        # suspicious pose
-        suspicious_pose = False
-        if P > 0:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = pose_detector.process(rgb)
-            if res.pose_landmarks:
-                lm = res.pose_landmarks.landmark
-                lw = lm[15]; rw = lm[16]; ls = lm[11]; rs = lm[12]
-                if lw.y < ls.y or rw.y < rs.y:
-                    suspicious_pose = True
-                    if event_type is None:
-                        event_type = "suspicious_body_language"
-                        event_confidence = 0.6
+        # real-time replay of recorded footage unless running at max speed
+        if from_file and not max_speed:
+            ahead = frame_idx / fps - (time.perf_counter() - replay_start)
+            if ahead > 0:
+                stop.wait(ahead)
 
-        last_centroids = {i: c for i, c in enumerate(centroids)}
+    cap.release()
 
-        # Cooldown
-        if event_type and (now - last_event_time) > COOLDOWN:
-            start_ts = datetime.utcnow() - timedelta(seconds=BUFFER_SECONDS) if BUFFER_SECONDS else datetime.utcnow()
-            end_ts = datetime.utcnow()
-            ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            clip_name = f"{CAMERA_ID}_{event_type}_{ts}.mp4"
-            clip_path = os.path.join(STORAGE_DIR, clip_name)
-            frames_to_save = list(buf)
-            save_clip(frames_to_save, clip_path, fps=fps)
-            print(f"[EVENT] {event_type} detected. Saved clip: {clip_path}")
-
-            # Encrypt clip
-            enc_name = clip_name + ".enc"
-            enc_path = os.path.join(STORAGE_DIR, enc_name)
-            encrypt_file(clip_path, enc_path)
-            print(f"Encrypted -> {enc_path}")
-
-            # Compute SHA256 hash
-            hash_hex = compute_sha256_file(enc_path)
-            print(f"SHA256 (encrypted): {hash_hex}")
-
-            # Post metadata
-            payload = {
-                "camera_id": CAMERA_ID,
-                "event_type": event_type,
-                "confidence": event_confidence,
-                "start_time": start_ts.isoformat(),
-                "end_time": end_ts.isoformat(),
-                "clip_path": clip_path,
-                "enc_path": enc_path,
-                "hash": hash_hex
-            }
-            status, resp_text = post_event(payload)
-            print("POST /event ->", status, resp_text)
-
-            last_event_time = now
-
-        cv2.imshow("Detect (press q to quit)", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+def run_sources(sources, detector, out, stop, preview=None, max_speed=False, sink=True):
+    """Worker: process (camera_id, source) pairs one after another with their own pose graph."""
+    pose_detector = create_pose_detector()
+    for camera_id, source in sources:
+        if stop.is_set():
             break
-
-    cap.release()
-    cv2.destroyAllWindows()
+        process_source(source, detector, pose_detector, out, camera_id=camera_id,
+                       max_speed=max_speed, sink=sink, stop=stop, preview=preview)
+
+def main(camera_source=0, device='cpu', headless=False, max_speed=False, jsonl=None, events_only=False, sink=True,
+         metrics_port=METRICS_PORT):
+    if metrics_port:
+        try:
+            metrics.start_http_server(metrics_port)
+            print(f"Metrics exporter on :{metrics_port}/metrics")
+        except OSError as e:
+            # e.g. a backfill next to the live detector on the same host
+            print(f"[WARN] Metrics exporter disabled, cannot bind :{metrics_port}: {e}")
+    detector = get_detector(device=device)
+
+    specs = camera_source if isinstance(camera_source, (list, tuple)) else [camera_source]
+    sources = expand_sources(specs)
+    # every live source runs concurrently in its own thread (it never ends);
+    # recorded files are replayed one after another on a single worker
+    groups = [[item] for item in sources if not is_file_source(item[1])]
+    files = [item for item in sources if is_file_source(item[1])]
+    if files:
+        groups.append(files)
+
+    out = JsonlWriter(jsonl, events_only=events_only)
+    stop = threading.Event()
+    preview = None if headless else {}
+    workers = [threading.Thread(target=run_sources, args=(group, detector, out, stop, preview, max_speed, sink),
+                                name=f"detect-{group[0][0]}", daemon=True) for group in groups]
+    for worker in workers:
+        worker.start()
+    if preview is not None:
+        print("Press 'q' in a preview window to quit.")
+    try:
+        while any(worker.is_alive() for worker in workers):
+            if preview is None:
+                time.sleep(0.2)
+                continue
+            for camera_id in list(preview):
+                cv2.imshow(f"Detect {camera_id} (press q to quit)", preview.pop(camera_id))
+            if cv2.waitKey(30) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+        out.close()
+        if not headless:
+            cv2.destroyAllWindows()
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Detect suspicious activity on cameras, streams or recorded clips")
+    parser.add_argument("--source", action="append", default=None,
+                        help="camera index, RTSP/HTTP URL, video file or directory of clips, optionally "
+                             "prefixed with a camera id (cam2=rtsp://...); repeatable, live sources run "
+                             "concurrently (default 0)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--headless", action="store_true", help="no preview window (servers, backfills)")
+    parser.add_argument("--max-speed", action="store_true", help="replay files as fast as possible instead of in real time")
+    parser.add_argument("--jsonl", help="append detections and events as JSON lines to this file")
+    parser.add_argument("--events-only", action="store_true", help="only write events to --jsonl")
+    parser.add_argument("--no-sink", action="store_true", help="don't save/encrypt/post clips; only report events")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help=f"/metrics exporter port, 0 = off (default {METRICS_PORT})")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main(camera_source=0, device='cpu')
+    args = parse_args()
+    main(camera_source=args.source or [0], device=args.device, headless=args.headless,
+         max_speed=args.max_speed, jsonl=args.jsonl, events_only=args.events_only, sink=not args.no_sink,
+         metrics_port=args.metrics_port)
@@ -1,16 +1,19 @@
 import os
 import cv2
 import json
-import base64
 import hashlib
 import requests
+import threading
+import time
 from datetime import datetime
 from dotenv import load_dotenv
-from ultralytics import YOLO
 import numpy as np
-import mediapipe as mp
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from pathlib import Path
+from AI.inference import INFERENCE_IMGSZ, get_detector
+from common import metrics
+from common.keys import load_aes_key
+from AI.density import find_clusters
 
 # Load .env
 root_path = Path(__file__).resolve().parent.parent
@@ -18,11 +21,7 @@ load_dotenv(dotenv_path=root_path / ".env")
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 CAMERA_ID = os.getenv("CAMERA_ID", "sim")
-AES_KEY_B64 = os.getenv("AES_KEY")
-
-if not AES_KEY_B64:
-    raise RuntimeError("Set AES_KEY in .env (base64 encoded 256-bit key)")
-AES_KEY = base64.b64decode(AES_KEY_B64)
+AES_KEY = load_aes_key()
 
 # ------------------ Token Fetch ------------------
 def fetch_new_token():
@@ -39,14 +38,46 @@ def fetch_new_token():
         print("[ERROR] Failed to fetch token:", e)
         return None
 
-ACCESS_TOKEN = fetch_new_token()
-
-# Load models
-model = YOLO(str(root_path / "ai" / "yolov8n.pt"))
-mp_pose = mp.solutions.pose
-pose_detector = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+# ------------------ Lazy Singletons ------------------
+# The detector (AI.inference), MediaPipe and the access token are created on
+# first use instead of at import time, so importing this module stays cheap.
+# The YOLO predictor and the (stateful) MediaPipe graph are not safe to use
+# from two threads at once, so warm-up and clip analysis share _inference_lock.
+_access_token = None
+_pose_detector = None
+_token_lock = threading.Lock()
+_pose_lock = threading.Lock()
+_inference_lock = threading.Lock()
+
+def get_access_token(refresh=False):
+    """Cached backend token; refresh=True logs in again (e.g. after a 401)."""
+    global _access_token
+    stale = _access_token if refresh else None
+    if _access_token is None or refresh:
+        with _token_lock:
+            # another thread may already have replaced the stale token
+            if _access_token is None or _access_token == stale:
+                _access_token = fetch_new_token()
+    return _access_token
+
+def get_pose_detector():
+    global _pose_detector
+    if _pose_detector is None:
+        with _pose_lock:
+            if _pose_detector is None:
+                import mediapipe as mp
+                _pose_detector = mp.solutions.pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+    return _pose_detector
+
+def warmup():
+    """Load YOLO + MediaPipe and run one dummy frame through each."""
+    dummy = np.zeros((INFERENCE_IMGSZ, INFERENCE_IMGSZ, 3), dtype=np.uint8)
+    with _inference_lock:
+        get_detector().detect(dummy)
+        get_pose_detector().process(dummy)
 
 def encrypt_file(in_path, out_path, key=AES_KEY):
+    t0 = time.perf_counter()
     aesgcm = AESGCM(key)
     nonce = os.urandom(12)
     with open(in_path, "rb") as f:
@@ -54,23 +85,37 @@ def encrypt_file(in_path, out_path, key=AES_KEY):
     ciphertext = aesgcm.encrypt(nonce, plaintext, None)
     with open(out_path, "wb") as f:
         f.write(nonce + ciphertext)
+    metrics.ENCRYPT_SECONDS.inc(time.perf_counter() - t0)
+    metrics.ENCRYPT_BYTES.inc(len(plaintext))
     return out_path
 
 def compute_sha256_file(path):
+    t0 = time.perf_counter()
     h = hashlib.sha256()
+    size = 0
     with open(path, "rb") as f:
         while chunk := f.read(65536):
             h.update(chunk)
+            size += len(chunk)
+    metrics.HASH_SECONDS.inc(time.perf_counter() - t0)
+    metrics.HASH_BYTES.inc(size)
     return h.hexdigest()
 
 def post_event(payload):
-    headers = {"Authorization": f"Bearer {ACCESS_TOKEN}"} if ACCESS_TOKEN else {}
-    if not ACCESS_TOKEN:
+    access_token = get_access_token()
+    if not access_token:
         print("[ERROR] ACCESS_TOKEN missing")
         return None, "Missing access token"
     try:
         print(f"[INFO] Sending POST /event with token")
-        resp = requests.post(f"{BACKEND_URL}/event", json=payload, headers=headers, timeout=30)
+        resp = requests.post(f"{BACKEND_URL}/event", json=payload,
+                             headers={"Authorization": f"Bearer {access_token}"}, timeout=30)
+        if resp.status_code == 401:
+            # token expired: log in again and retry once
+            access_token = get_access_token(refresh=True)
+            if access_token:
+                resp = requests.post(f"{BACKEND_URL}/event", json=payload,
+                                     headers={"Authorization": f"Bearer {access_token}"}, timeout=30)
         print(f"[INFO] POST /event -> {resp.status_code}: {resp.text}")
         return resp.status_code, resp.text
     except Exception as e:
@@ -79,55 +124,64 @@ def post_event(payload):
 
 def analyze_clip(path):
     print(f"[DEBUG] Analyzing clip: {path}")
+    detector = get_detector()
+    pose_detector = get_pose_detector()
+    frames_total = metrics.FRAMES.labels("upload")
+    inference_seconds = metrics.INFERENCE_SECONDS.labels("upload", detector.name)
     cap = cv2.VideoCapture(path)
-    persons, speeds, centroids = 0, [], []
-    frame_area = None
+    persons, speeds = 0, []
+    person_frames, crowd_frames = 0, 0
     suspicious = False
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # one clip at a time: the pose graph tracks across consecutive frames
+    with _inference_lock:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
 
-        results = model(frame, imgsz=640)[0]
-        if frame_area is None:
-            frame_area = frame.shape[0] * frame.shape[1]
+            t0 = time.perf_counter()
+            boxes, _ = detector.detect(frame)
+            inference_seconds.observe(time.perf_counter() - t0)
+            frames_total.inc()
 
-        local_centroids, p_count = [], 0
-        for box in results.boxes:
-            if int(box.cls[0]) == 0:
+            local_centroids, p_count = [], 0
+            for x1, y1, x2, y2 in boxes.astype(int).tolist():
                 p_count += 1
-                x1, y1, x2, y2 = map(int, box.xyxy[0].tolist())
                 cx = int((x1 + x2) / 2)
                 cy = int((y1 + y2) / 2)
                 local_centroids.append((cx, cy))
 
-        if len(local_centroids) > 1:
-            dists = [np.linalg.norm(np.array(c1) - np.array(c2)) for c1, c2 in zip(local_centroids, local_centroids[1:])]
-            speeds.extend(dists)
+            if len(local_centroids) > 1:
+                dists = [np.linalg.norm(np.array(c1) - np.array(c2)) for c1, c2 in zip(local_centroids, local_centroids[1:])]
+                speeds.extend(dists)
+
+            if p_count >= 5:
+                crowds = find_clusters(boxes, frame.shape, min_size=5)
+                if any(c["area_ratio"] < 0.2 for c in crowds):
+                    crowd_frames += 1
 
-        if p_count > 0:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = pose_detector.process(rgb)
-            if res.pose_landmarks:
-                lm = res.pose_landmarks.landmark
-                lw = lm[15]; rw = lm[16]; ls = lm[11]; rs = lm[12]
-                if lw.y < ls.y or rw.y < rs.y:
-                    suspicious = True
+            if p_count > 0:
+                person_frames += 1
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                res = pose_detector.process(rgb)
+                if res.pose_landmarks:
+                    lm = res.pose_landmarks.landmark
+                    lw = lm[15]; rw = lm[16]; ls = lm[11]; rs = lm[12]
+                    if lw.y < ls.y or rw.y < rs.y:
+                        suspicious = True
 
-        persons += p_count
-        centroids.extend(local_centroids)
+            persons += p_count
 
     cap.release()
 
     avg_speed = np.mean(speeds or [0])
     print(f"[DEBUG] Persons: {persons}, Speed: {avg_speed:.2f}, Suspicious: {suspicious}")
 
-    if persons >= 5:
-        xs, ys = [c[0] for c in centroids], [c[1] for c in centroids]
-        area_ratio = ((max(xs) - min(xs)) * (max(ys) - min(ys))) / frame_area
-        print(f"[DEBUG] Crowd area ratio: {area_ratio:.3f}")
-        if area_ratio < 0.2:
+    # mob: a compact crowd of 5+ (AI/density.py) in at least 30% of the frames with people
+    if crowd_frames:
+        print(f"[DEBUG] Crowd frames: {crowd_frames}/{person_frames}")
+        if crowd_frames >= 0.3 * person_frames:
             return "mob_formation", 0.8
 
     if persons >= 2 and avg_speed > 12:
@@ -148,6 +202,7 @@ def analyze_clip_full(camera_id, clip_path, skip_post=False):
     encrypt_file(clip_path, enc_path)
     file_hash = compute_sha256_file(enc_path)
     event_type, confidence = analyze_clip(clip_path)
+    metrics.EVENTS.labels(camera_id, event_type).inc()
 
     payload = {
         "camera_id": camera_id,
@@ -174,5 +229,12 @@ def analyze_clip_full(camera_id, clip_path, skip_post=False):
     return payload
 
 if __name__ == "__main__":
-    result = analyze_clip_full("cam2", "../Storage/criminal activity clip 1.mp4")
+    # run from the repo root: python -m AI.detect_clip_upload <clip.mp4> [--camera-id cam2] [--no-post]
+    import argparse
+    parser = argparse.ArgumentParser(description="Classify, encrypt and log one recorded clip")
+    parser.add_argument("clip")
+    parser.add_argument("--camera-id", default=CAMERA_ID)
+    parser.add_argument("--no-post", action="store_true", help="don't POST /event to the backend")
+    args = parser.parse_args()
+    result = analyze_clip_full(args.camera_id, args.clip, skip_post=args.no_post)
     print("[FINAL]", result)
@@ -0,0 +1,213 @@
+"""
+Pluggable person-detection backends for the AI module.
+
+- "torch":     Ultralytics YOLO on the .pt weights (original path)
+- "onnx":      ONNX export run through ONNX Runtime
+- "onnx-int8": ONNX export with INT8-quantized weights
+
+Every backend exposes detect(frame) -> (boxes, scores), where boxes is an
+(N, 4) float32 array of person xyxy boxes in frame pixels and scores is (N,).
+detect() may be called from several threads (one per live camera).
+Exported models are cached in models/ next to the weights' stem and input size.
+"""
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+root_path = Path(__file__).resolve().parent.parent
+load_dotenv(dotenv_path=root_path / ".env")
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+INFERENCE_IMGSZ = int(os.getenv("INFERENCE_IMGSZ", 640))
+INFERENCE_DEVICE = os.getenv("INFERENCE_DEVICE", "cpu")
+YOLO_WEIGHTS = os.getenv("YOLO_WEIGHTS", str(root_path / "yolov8n.pt"))
+MODEL_CACHE_DIR = Path(os.getenv("MODEL_CACHE_DIR", str(root_path / "models")))
+INT8_CALIBRATION_CLIP = os.getenv("INT8_CALIBRATION_CLIP")  # static INT8 if set, dynamic otherwise
+
+CONF_THRESHOLD = float(os.getenv("CONF_THRESHOLD", 0.25))
+IOU_THRESHOLD = float(os.getenv("IOU_THRESHOLD", 0.45))
+PERSON_CLASS_ID = 0               # COCO person class
+
+# ONNX Runtime tuning (0 = let ORT pick, usually the number of physical cores)
+ORT_INTRA_THREADS = int(os.getenv("ORT_INTRA_THREADS", 0))
+ORT_INTER_THREADS = int(os.getenv("ORT_INTER_THREADS", 1))
+# e.g. "OpenVINOExecutionProvider,CPUExecutionProvider" with onnxruntime-openvino
+ORT_PROVIDERS = os.getenv("ORT_PROVIDERS", "CPUExecutionProvider").split(",")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+# ------------------ Torch (Ultralytics) ------------------
+class TorchDetector:
+    name = "torch"
+
+    def __init__(self, weights=YOLO_WEIGHTS, imgsz=INFERENCE_IMGSZ, device=INFERENCE_DEVICE,
+                 conf=CONF_THRESHOLD, iou=IOU_THRESHOLD):
+        from ultralytics import YOLO
+        self.model = YOLO(weights)
+        self.imgsz = imgsz
+        self.device = device
+        self.conf = conf
+        self.iou = iou             # same NMS threshold as the ONNX path, so backends are comparable
+        self._lock = threading.Lock()   # the Ultralytics predictor isn't thread-safe
+
+    def detect(self, frame):
+        with self._lock:
+            res = self.model(frame, imgsz=self.imgsz, device=self.device, conf=self.conf, iou=self.iou,
+                             classes=[PERSON_CLASS_ID], verbose=False)[0]
+        return (res.boxes.xyxy.cpu().numpy().astype(np.float32),
+                res.boxes.conf.cpu().numpy().astype(np.float32))
+
+
+# ------------------ ONNX export / quantization ------------------
+def _is_stale(path, source):
+    return not path.exists() or (os.path.exists(source) and os.path.getmtime(source) > path.stat().st_mtime)
+
+
+def _calibration_frames(clip_path, imgsz, limit=64):
+    cap = cv2.VideoCapture(clip_path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(preprocess(frame, imgsz)[0])
+    cap.release()
+    return frames
+
+
+def export_onnx(weights=YOLO_WEIGHTS, imgsz=INFERENCE_IMGSZ, int8=False, calibration_clip=INT8_CALIBRATION_CLIP):
+    """Export (and optionally INT8-quantize) the weights, reusing the cached file if up to date."""
+    MODEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = Path(weights).stem
+    onnx_path = MODEL_CACHE_DIR / f"{stem}_{imgsz}.onnx"
+
+    if _is_stale(onnx_path, weights):
+        from ultralytics import YOLO
+        print(f"[INFO] Exporting {weights} to ONNX (imgsz={imgsz})")
+        exported = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=False)
+        shutil.move(str(exported), onnx_path)
+
+    if not int8:
+        return onnx_path
+
+    int8_path = MODEL_CACHE_DIR / f"{stem}_{imgsz}_int8.onnx"
+    if _is_stale(int8_path, str(onnx_path)):
+        from onnxruntime import quantization as q
+        if calibration_clip:
+            # Static QDQ quantization calibrated on real frames: best accuracy for conv nets
+            print(f"[INFO] Static INT8 quantization calibrated on {calibration_clip}")
+            frames = _calibration_frames(calibration_clip, imgsz)
+
+            class _Reader(q.CalibrationDataReader):
+                def __init__(self):
+                    self._it = iter(frames)
+
+                def get_next(self):
+                    blob = next(self._it, None)
+                    return None if blob is None else {"images": blob}
+
+            q.quantize_static(str(onnx_path), str(int8_path), _Reader(),
+                              quant_format=q.QuantFormat.QDQ,
+                              activation_type=q.QuantType.QUInt8, weight_type=q.QuantType.QInt8)
+        else:
+            print("[INFO] Dynamic INT8 quantization (set INT8_CALIBRATION_CLIP for static)")
+            q.quantize_dynamic(str(onnx_path), str(int8_path), weight_type=q.QuantType.QUInt8)
+    return int8_path
+
+
+# ------------------ ONNX Runtime ------------------
+def preprocess(frame, imgsz):
+    """Letterbox to imgsz x imgsz and return (NCHW float blob, scale, pad_x, pad_y)."""
+    h, w = frame.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    nh, nw = int(round(h * r)), int(round(w * r))
+    top, left = (imgsz - nh) // 2, (imgsz - nw) // 2
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    blob = cv2.dnn.blobFromImage(canvas, 1 / 255.0, swapRB=True)
+    return blob, r, left, top
+
+
+def postprocess(output, r, pad_x, pad_y, frame_shape, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD):
+    """Decode YOLOv8 output (1, 4 + classes, anchors), keeping the person class only."""
+    pred = output[0]
+    scores = pred[4 + PERSON_CLASS_ID]
+    keep = scores > conf
+    if not keep.any():
+        return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32)
+
+    cx, cy, bw, bh = pred[:4, keep]
+    scores = scores[keep]
+    x1 = (cx - bw / 2 - pad_x) / r
+    y1 = (cy - bh / 2 - pad_y) / r
+
+    idx = cv2.dnn.NMSBoxes(np.stack([x1, y1, bw / r, bh / r], axis=1).tolist(), scores.tolist(), conf, iou)
+    idx = np.array(idx, dtype=int).reshape(-1)
+
+    h, w = frame_shape[:2]
+    boxes = np.stack([x1, y1, x1 + bw / r, y1 + bh / r], axis=1)[idx]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+    return boxes.astype(np.float32), scores[idx].astype(np.float32)
+
+
+class OnnxDetector:
+    name = "onnx"
+
+    def __init__(self, weights=YOLO_WEIGHTS, imgsz=INFERENCE_IMGSZ, int8=False, conf=CONF_THRESHOLD):
+        import onnxruntime as ort
+
+        self.path = export_onnx(weights, imgsz, int8=int8)
+        self.imgsz = imgsz
+        self.conf = conf
+        if int8:
+            self.name = "onnx-int8"
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        so.intra_op_num_threads = ORT_INTRA_THREADS
+        so.inter_op_num_threads = ORT_INTER_THREADS
+
+        available = ort.get_available_providers()
+        providers = [p for p in ORT_PROVIDERS if p in available] or ["CPUExecutionProvider"]
+        self.session = ort.InferenceSession(str(self.path), sess_options=so, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def detect(self, frame):
+        blob, r, pad_x, pad_y = preprocess(frame, self.imgsz)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return postprocess(output, r, pad_x, pad_y, frame.shape, conf=self.conf)
+
+
+# ------------------ Factory ------------------
+def create_detector(backend=INFERENCE_BACKEND, imgsz=INFERENCE_IMGSZ, device=INFERENCE_DEVICE, weights=YOLO_WEIGHTS):
+    if backend == "torch":
+        return TorchDetector(weights, imgsz, device)
+    if backend == "onnx":
+        return OnnxDetector(weights, imgsz)
+    if backend == "onnx-int8":
+        return OnnxDetector(weights, imgsz, int8=True)
+    raise ValueError(f"Unknown inference backend: {backend} (choose from {', '.join(BACKENDS)})")
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_detector(backend=None, imgsz=None, device=None):
+    """Shared detector, created on first use; later arguments are ignored."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = create_detector(backend or INFERENCE_BACKEND,
+                                            imgsz or INFERENCE_IMGSZ,
+                                            device or INFERENCE_DEVICE)
+    return _detector
@@ -0,0 +1,152 @@
+"""
+Sliding-window temporal event scoring.
+
+Instead of firing on a single frame, per-frame signals (mean track speed,
+person count, mob flag, pose flag) are pushed into windows covering the
+last `window_seconds` of stream time. Samples are evicted by timestamp, so
+the window spans the same time whether frames arrive at the camera's rate
+or slower (live frames dropped while detection catches up). Every
+mean/variance is O(1) and each push is amortized O(1).
+
+Each event type has a rule with hysteresis: it becomes active when its
+windowed score reaches `enter` and only re-arms after falling below `exit`.
+An activation fires once, as soon as that type's own cooldown allows it.
+An incident that starts during a cooldown therefore fires when the
+cooldown ends, provided its score stays above `exit` until then; if it
+falls below `exit` first, the rule re-arms and that activation is never
+reported.
+"""
+import math
+from collections import deque
+
+
+class RollingStats:
+    """Mean / variance over the samples of the last `seconds` of stream time."""
+
+    __slots__ = ("seconds", "_samples", "_sum", "_sumsq", "_pushes")
+
+    RESYNC_EVERY = 4096   # pushes; recompute sums from the window to bound float drift
+
+    def __init__(self, seconds):
+        self.seconds = float(seconds)
+        self._samples = deque()      # (t, x), oldest first
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._pushes = 0
+
+    def push(self, t, x):
+        x = float(x)
+        samples = self._samples
+        samples.append((t, x))
+        self._sum += x
+        self._sumsq += x * x
+
+        cutoff = t - self.seconds
+        while samples and samples[0][0] <= cutoff:
+            _, old = samples.popleft()
+            self._sum -= old
+            self._sumsq -= old * old
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self._sum = math.fsum(v for _, v in samples)
+            self._sumsq = math.fsum(v * v for _, v in samples)
+
+    @property
+    def n(self):
+        return len(self._samples)
+
+    @property
+    def span(self):
+        """Stream time covered by the samples in the window."""
+        return self._samples[-1][0] - self._samples[0][0] if self._samples else 0.0
+
+    @property
+    def mean(self):
+        return self._sum / self.n if self.n else 0.0
+
+    @property
+    def var(self):
+        if not self.n:
+            return 0.0
+        m = self._sum / self.n
+        return max(0.0, self._sumsq / self.n - m * m)
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class EventRule:
+    """Fires `event_type` when the windowed mean of `signal` crosses `enter` (re-arms below `exit`)."""
+
+    def __init__(self, event_type, signal, enter, exit, cooldown, confidence):
+        if exit > enter:
+            raise ValueError(f"{event_type}: exit threshold must not exceed enter threshold")
+        self.event_type = event_type
+        self.signal = signal          # "speed" | "persons" | "mob" | "pose"
+        self.enter = enter
+        self.exit = exit
+        self.cooldown = cooldown
+        self.confidence = confidence
+
+
+class _RuleState:
+    __slots__ = ("active", "fired", "last_fired")
+
+    def __init__(self):
+        self.active = False
+        self.fired = False
+        self.last_fired = float("-inf")
+
+
+class EventScorer:
+    """
+    Windowed event decisions for one video stream.
+
+    rules are checked in priority order; update() returns the events that
+    fire on this frame as (event_type, confidence, score), highest priority first.
+    Each returned event counts as handled (its cooldown starts), so callers
+    must act on all of them, not just the first. No event fires until the
+    stream has covered min_fill of the window.
+    """
+
+    SIGNALS = ("speed", "persons", "mob", "pose")
+
+    def __init__(self, rules, window_seconds=2.0, min_fill=0.5):
+        self.windows = {name: RollingStats(window_seconds) for name in self.SIGNALS}
+        self.rules = list(rules)
+        self.min_span = window_seconds * min_fill
+        self.started = None
+        self._state = {rule.event_type: _RuleState() for rule in self.rules}
+
+    def update(self, t, persons, speed, mob, pose):
+        w = self.windows
+        w["persons"].push(t, persons)
+        w["speed"].push(t, speed)
+        w["mob"].push(t, 1.0 if mob else 0.0)
+        w["pose"].push(t, 1.0 if pose else 0.0)
+        if self.started is None:
+            self.started = t
+        if t - self.started < self.min_span:
+            return []
+
+        fired = []
+        for rule in self.rules:
+            state = self._state[rule.event_type]
+            score = w[rule.signal].mean
+            if state.active and score < rule.exit:
+                state.active = False
+                state.fired = False
+            elif not state.active and score >= rule.enter:
+                state.active = True
+
+            if state.active and not state.fired and t - state.last_fired >= rule.cooldown:
+                state.fired = True
+                state.last_fired = t
+                fired.append((rule.event_type, rule.confidence, score))
+        return fired
+
+    def snapshot(self):
+        """Current window statistics, e.g. for event metadata."""
+        return {name: {"mean": round(s.mean, 4), "std": round(s.std, 4)} for name, s in self.windows.items()}
@@ -1,8 +1,10 @@
 import os
 import json
 import hashlib
+import threading
+import time
 from dotenv import load_dotenv
-from web3 import Web3
+from common import metrics
 
 # Load environment
 load_dotenv()
@@ -14,15 +16,39 @@ CHAIN_DIR = os.path.join(os.path.dirname(__file__), "chain")
 ABI_PATH = os.path.join(CHAIN_DIR, "evidence_abi.json")
 ADDR_PATH = os.path.join(CHAIN_DIR, "evidence_address.txt")
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER))
-acct = w3.eth.account.from_key(PRIVATE_KEY)
+# Web3 client, account and contract are created lazily on first use
+_w3 = None
+_acct = None
+_contract = None
+_chain_lock = threading.Lock()
 
-with open(ABI_PATH, 'r') as f:
-    ABI = json.load(f)
 
-CONTRACT_ADDRESS = open(ADDR_PATH).read().strip()
-contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=ABI)
+def get_chain():
+    """Return (w3, acct, contract), connecting on the first call."""
+    global _w3, _acct, _contract
+    if _contract is None:
+        with _chain_lock:
+            if _contract is None:
+                from web3 import Web3
+
+                w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER))
+                acct = w3.eth.account.from_key(PRIVATE_KEY)
+
+                with open(ABI_PATH, 'r') as f:
+                    abi = json.load(f)
+
+                with open(ADDR_PATH) as f:
+                    contract_address = f.read().strip()
+
+                _w3, _acct = w3, acct
+                _contract = w3.eth.contract(address=contract_address, abi=abi)
+    return _w3, _acct, _contract
+
+
+def warmup():
+    """Connect to the chain ahead of the first transaction."""
+    w3, _, _ = get_chain()
+    return w3.is_connected()
 
 
 def compute_sha256_file(path):
@@ -55,22 +81,32 @@ def log_event_on_chain(hash_hex: str, metadata: str, enc_file_path: str = None):
         else:
             raise ValueError(f"Invalid hex hash received and no valid file to regenerate: {hash_hex}")
 
-    # Build transaction
-    nonce = w3.eth.get_transaction_count(acct.address)
-    tx = contract.functions.logEvent(hash_bytes, metadata).build_transaction({
-        'from': acct.address,
-        'nonce': nonce,
-        'gas': 500000,
-        'gasPrice': w3.to_wei('20', 'gwei')
-    })
-
-    # Sign transaction
-    signed = acct.sign_transaction(tx)
+    w3, acct, contract = get_chain()
 
-    # Send transaction (Web3.py v6 uses snake_case)
-    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-
-    # Wait for receipt
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    t0 = time.perf_counter()
+    status = "error"
+    metrics.CHAIN_TX_PENDING.inc()
+    try:
+        # Build transaction
+        nonce = w3.eth.get_transaction_count(acct.address)
+        tx = contract.functions.logEvent(hash_bytes, metadata).build_transaction({
+            'from': acct.address,
+            'nonce': nonce,
+            'gas': 500000,
+            'gasPrice': w3.to_wei('20', 'gwei')
+        })
+
+        # Sign transaction
+        signed = acct.sign_transaction(tx)
+
+        # Send transaction (Web3.py v6 uses snake_case)
+        tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+
+        # Wait for receipt
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        status = "ok" if receipt.status == 1 else "reverted"
+    finally:
+        metrics.CHAIN_TX_PENDING.dec()
+        metrics.CHAIN_TX_SECONDS.labels(status).observe(time.perf_counter() - t0)
 
     return receipt.transactionHash.hex()
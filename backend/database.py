@@ -1,13 +1,28 @@
 import motor.motor_asyncio
+from pymongo import monitoring
 from dotenv import load_dotenv
 import os
+from common import metrics
 
 # Load environment variables
 load_dotenv()
 
+class CommandMetrics(monitoring.CommandListener):
+    """Records every MongoDB command's latency in ims_mongo_command_seconds."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.MONGO_COMMAND_SECONDS.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        metrics.MONGO_COMMAND_SECONDS.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
 # MongoDB connection
 MONGO_URI = os.getenv("DB_URI", "mongodb://localhost:27017/cctv_ai")
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
+client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI, event_listeners=[CommandMetrics()])
 db = client["cctv_ai"]
 
 # Collections
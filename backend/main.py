@@ -1,5 +1,7 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Form, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from backend.auth import (
@@ -11,14 +13,21 @@ from backend.auth import (
     get_current_admin_user,
 )
 from backend.database import users_collection, events_collection
-from backend.blockchain import log_event_on_chain
+from backend.blockchain import log_event_on_chain, warmup as warmup_chain
+from backend.retention import RETENTION_ENABLED, retention_manager
 
 import json
 import os
+import asyncio
 import aiofiles
 import uuid
+import time
 from datetime import datetime
-from AI.detect_clip_upload import analyze_clip_full
+from common import metrics
+from AI.detect_clip_upload import analyze_clip_full, warmup as warmup_detector
+
+# Load YOLO/MediaPipe and connect to the chain in the background after startup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
 
 app = FastAPI(title="CCTV-AI Blockchain API")
 
@@ -33,6 +42,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ----------------------------
+# Metrics
+# ----------------------------
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), status
+        ).observe(time.perf_counter() - t0)
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # ----------------------------
 # Auth Models & Endpoints
 # ----------------------------
@@ -66,6 +97,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 # ----------------------------
 @app.post("/classify_upload")
 async def classify_and_log_event(
+    background_tasks: BackgroundTasks,
     camera_id: str = Form(...),
     file: UploadFile = File(...),
     user: dict = Depends(get_current_user)
@@ -77,7 +109,8 @@ async def classify_and_log_event(
         async with aiofiles.open(raw_path, "wb") as f:
             await f.write(await file.read())
 
-        result = analyze_clip_full(camera_id, raw_path, skip_post=True)
+        # off the event loop: analysis waits for any running warm-up (shared models)
+        result = await run_in_threadpool(analyze_clip_full, camera_id, raw_path, skip_post=True)
         print("[AI Result]", result)
 
         # Direct DB + Blockchain logging
@@ -88,6 +121,8 @@ async def classify_and_log_event(
         record["tx_hash"] = tx_hash
         record["user"] = user["username"]
         await events_collection.insert_one(record)
+        if RETENTION_ENABLED:
+            background_tasks.add_task(retention_manager.release_plaintext, record)
 
         return {
             "status": "success",
@@ -115,7 +150,7 @@ class EventModel(BaseModel):
     hash: str
 
 @app.post("/event")
-async def log_event(event: EventModel, user: dict = Depends(get_current_user)):
+async def log_event(event: EventModel, background_tasks: BackgroundTasks, user: dict = Depends(get_current_user)):
     try:
         metadata = json.dumps(event.dict())
         tx_hash = log_event_on_chain(event.hash, metadata, enc_file_path=event.enc_path)
@@ -124,6 +159,8 @@ async def log_event(event: EventModel, user: dict = Depends(get_current_user)):
         record["tx_hash"] = tx_hash
         record["user"] = user["username"]
         await events_collection.insert_one(record)
+        if RETENTION_ENABLED:
+            background_tasks.add_task(retention_manager.release_plaintext, record)
 
         return {"status": "success", "tx_hash": tx_hash}
     except Exception as e:
@@ -141,10 +178,27 @@ async def get_all_events(user: dict = Depends(get_current_user)):
 async def get_admin_dashboard(user: dict = Depends(get_current_admin_user)):
     return {"message": f"Welcome, Admin {user['username']}"}
 
+@app.post("/admin/retention")
+async def run_retention(user: dict = Depends(get_current_admin_user)):
+    return {"status": "success", **(await retention_manager.run_once())}
+
+def warmup_models():
+    for name, warmup in (("models", warmup_detector), ("blockchain", warmup_chain)):
+        try:
+            warmup()
+            print(f"[WARMUP] {name} ready")
+        except Exception as e:
+            print(f"[WARMUP] {name} failed:", e)
+
 @app.on_event("startup")
 async def startup_event():
     await ensure_admin()
+    if WARMUP_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, warmup_models)
+    if RETENTION_ENABLED:
+        app.state.retention_task = asyncio.create_task(retention_manager.run_forever())
 
 
-from backend.routes import live_stream
+from backend.routes import live_stream, verification
 app.include_router(live_stream.router)
+app.include_router(verification.router)
@@ -0,0 +1,322 @@
+"""
+Storage retention for raw (.mp4) and encrypted (.mp4.enc) clips.
+
+Runs as a background task in the backend. Each pass scans storage/ once
+(os.scandir) and applies, in order:
+
+1. Plaintext release: delete a raw clip once its encrypted copy is verified.
+   The .enc hash must match the event record, and the AES-GCM decryption
+   must reproduce the raw file byte for byte. New events are also released
+   right after they are stored.
+2. Re-compression (optional, only while plaintext is kept): raw clips older
+   than RECOMPRESS_AFTER_DAYS are re-encoded at a lower bitrate. Encrypted
+   copies are never touched, because their hash is on-chain.
+3. Age: clips older than RETENTION_DAYS (overridable per event type with
+   RETENTION_DAYS_<EVENT_TYPE>) are deleted.
+4. Quota: while storage/ exceeds STORAGE_QUOTA_GB, evict clips with the
+   shortest retention first, oldest first.
+
+Files without an event record (clips the detector is still saving,
+encrypting or posting, uploads still being analysed) are left alone by
+steps 3 and 4 until they are older than RETENTION_ORPHAN_GRACE_HOURS.
+
+A file that fails in step 1 or 2 (unreadable clip, ffmpeg error, deleted
+mid-pass) is logged and skipped; the pass always goes on to steps 3 and 4.
+
+Event records in Mongo are kept (their chain entries remain), but are marked
+with clip_deleted_at / enc_deleted_at / clip_recompressed_at, or
+clip_verify_failed_at when a raw clip is kept because its copy didn't verify
+and clip_recompress_failed_at when re-encoding failed (not retried). All file reads
+go through a token bucket (RETENTION_IO_MBPS) so live recording isn't starved.
+"""
+import os
+import time
+import shutil
+import asyncio
+import hashlib
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from common import metrics
+from common.keys import load_aes_key
+from backend.database import events_collection
+
+ROOT = Path(__file__).resolve().parent.parent
+STORAGE_DIR = os.getenv("STORAGE_DIR", str(ROOT / "storage"))
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "1") == "1"
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", 60))
+DELETE_PLAINTEXT = os.getenv("RETENTION_DELETE_PLAINTEXT", "1") == "1"
+RETENTION_DAYS = float(os.getenv("RETENTION_DAYS", 0))              # 0 = keep forever
+STORAGE_QUOTA_GB = float(os.getenv("STORAGE_QUOTA_GB", 0))          # 0 = unlimited
+RECOMPRESS_AFTER_DAYS = float(os.getenv("RECOMPRESS_AFTER_DAYS", 0))  # 0 = off
+RECOMPRESS_CRF = int(os.getenv("RECOMPRESS_CRF", 32))
+IO_RATE_MBPS = float(os.getenv("RETENTION_IO_MBPS", 20))
+ORPHAN_GRACE_HOURS = float(os.getenv("RETENTION_ORPHAN_GRACE_HOURS", 24))
+
+AES_KEY = load_aes_key()
+DAY = 86400
+
+
+def retention_days(event_type):
+    days = float(os.getenv(f"RETENTION_DAYS_{str(event_type).upper()}", RETENTION_DAYS))
+    return days if days > 0 else float("inf")
+
+
+def _key(path):
+    return os.path.realpath(path) if path else None
+
+
+class TokenBucket:
+    """Blocking byte-rate limiter shared by all retention I/O."""
+
+    def __init__(self, rate_bytes, burst=None):
+        self.rate = rate_bytes
+        self.capacity = burst or rate_bytes
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+# ------------------ file operations (run in a worker thread) ------------------
+def _sha256(path, limiter, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(chunk):
+            limiter.consume(len(data))
+            h.update(data)
+    return h.hexdigest()
+
+
+def verify_encrypted_copy(clip_path, enc_path, expected_hash, limiter):
+    """True if enc_path matches expected_hash and decrypts to exactly clip_path."""
+    limiter.consume(os.path.getsize(enc_path))
+    with open(enc_path, "rb") as f:
+        data = f.read()
+    if expected_hash:
+        expected = expected_hash.lower()
+        expected = expected[2:] if expected.startswith("0x") else expected
+        if hashlib.sha256(data).hexdigest() != expected:
+            return False
+    try:
+        plaintext = AESGCM(AES_KEY).decrypt(data[:12], data[12:], None)
+    except InvalidTag:
+        return False
+    return hashlib.sha256(plaintext).hexdigest() == _sha256(clip_path, limiter)
+
+
+def recompress_clip(path, limiter, crf=RECOMPRESS_CRF):
+    """Re-encode in place at a lower bitrate; keeps the original if it isn't smaller."""
+    st = os.stat(path)
+    limiter.consume(st.st_size)
+    tmp = path + ".recompress.mp4"
+    try:
+        if shutil.which("ffmpeg"):
+            subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", path, "-an",
+                            "-c:v", "libx264", "-preset", "veryfast", "-crf", str(crf), tmp], check=True)
+        else:
+            _recompress_cv2(path, tmp)
+
+        saved = os.path.getsize(path) - os.path.getsize(tmp)
+        if saved > 0:
+            os.replace(tmp, path)
+            os.utime(path, (st.st_atime, st.st_mtime))   # age-based retention keeps counting from recording
+            return saved
+        return 0
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _recompress_cv2(path, tmp):
+    """Half-resolution mp4v re-encode, for hosts without ffmpeg."""
+    import cv2
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 20
+    out = None
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame = cv2.resize(frame, (frame.shape[1] // 2, frame.shape[0] // 2), interpolation=cv2.INTER_AREA)
+            if out is None:
+                out = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*"mp4v"), fps, (frame.shape[1], frame.shape[0]))
+                if not out.isOpened():
+                    raise RuntimeError("could not open the mp4v writer")
+            out.write(frame)
+    finally:
+        cap.release()
+        if out is not None:
+            out.release()
+    if out is None:
+        raise RuntimeError("no frames could be decoded")
+
+
+def scan_storage(storage_dir=STORAGE_DIR):
+    """One directory pass -> {realpath: (size, mtime)}."""
+    files = {}
+    if not os.path.isdir(storage_dir):
+        return files
+    with os.scandir(storage_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith((".mp4", ".enc")):
+                st = entry.stat()
+                files[_key(entry.path)] = (st.st_size, st.st_mtime)
+    return files
+
+
+# ------------------ manager ------------------
+class RetentionManager:
+    def __init__(self, storage_dir=STORAGE_DIR, io_rate_mbps=IO_RATE_MBPS):
+        self.storage_dir = storage_dir
+        self.limiter = TokenBucket(io_rate_mbps * 2**20)
+        self._pass_lock = asyncio.Lock()
+
+    async def _in_thread(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _mark(self, record, **fields):
+        if record.get("_id") is not None:
+            await events_collection.update_one({"_id": record["_id"]}, {"$set": fields})
+
+    async def _delete(self, path, reason, files):
+        size = files.pop(path, (0, 0))[0]
+        try:
+            await self._in_thread(os.remove, path)
+        except FileNotFoundError:
+            return 0
+        metrics.RETENTION_DELETED_BYTES.labels(reason).inc(size)
+        return size
+
+    async def release_plaintext(self, record):
+        """Delete a record's raw clip if its encrypted copy checks out; returns bytes freed."""
+        async with self._pass_lock:     # not while a pass is working on the same files
+            try:
+                return await self._release_plaintext(record)
+            except Exception as e:
+                print(f"[RETENTION] Plaintext release failed for {record.get('clip_path')}: {e}")
+                return 0
+
+    async def _release_plaintext(self, record, files=None):
+        clip, enc = _key(record.get("clip_path")), _key(record.get("enc_path"))
+        if not (DELETE_PLAINTEXT and clip and enc and clip != enc):
+            return 0
+        if record.get("clip_deleted_at") or record.get("clip_verify_failed_at"):
+            return 0
+        if not (os.path.exists(clip) and os.path.exists(enc)):
+            return 0
+        if not await self._in_thread(verify_encrypted_copy, clip, enc, record.get("hash"), self.limiter):
+            print(f"[RETENTION] Encrypted copy failed verification, keeping plaintext: {clip}")
+            await self._mark(record, clip_verify_failed_at=datetime.utcnow().isoformat())
+            return 0
+        freed = await self._delete(clip, "plaintext", files if files is not None else {})
+        await self._mark(record, clip_deleted_at=datetime.utcnow().isoformat())
+        return freed
+
+    async def run_once(self):
+        async with self._pass_lock:
+            return await self._run_once()
+
+    async def _run_once(self):
+        now = time.time()
+        stats = {"plaintext_freed": 0, "recompressed_saved": 0, "expired_freed": 0, "quota_freed": 0}
+        files = await self._in_thread(scan_storage, self.storage_dir)
+
+        records = {}       # realpath -> record, for both clip and enc paths
+        async for rec in events_collection.find({}, {"clip_path": 1, "enc_path": 1, "hash": 1, "event_type": 1,
+                                                     "clip_deleted_at": 1, "clip_verify_failed_at": 1,
+                                                     "clip_recompressed_at": 1, "clip_recompress_failed_at": 1}):
+            for field in ("clip_path", "enc_path"):
+                if rec.get(field):
+                    records[_key(rec[field])] = rec
+
+        # 1. plaintext release
+        for rec in {id(r): r for r in records.values()}.values():
+            clip = _key(rec.get("clip_path"))
+            if clip in files:
+                try:
+                    stats["plaintext_freed"] += await self._release_plaintext(rec, files)
+                except Exception as e:
+                    print(f"[RETENTION] Plaintext release failed for {clip}: {e}")
+
+        # 2. re-compression of plaintext that is being kept
+        if RECOMPRESS_AFTER_DAYS > 0 and not DELETE_PLAINTEXT:
+            for path, (size, mtime) in list(files.items()):
+                rec = records.get(path, {})
+                if (rec.get("_id") is not None and path == _key(rec.get("clip_path"))
+                        and now - mtime > RECOMPRESS_AFTER_DAYS * DAY
+                        and not rec.get("clip_recompressed_at") and not rec.get("clip_recompress_failed_at")):
+                    try:
+                        saved = await self._in_thread(recompress_clip, path, self.limiter)
+                    except Exception as e:
+                        print(f"[RETENTION] Re-compression failed, keeping the original: {path}: {e}")
+                        await self._mark(rec, clip_recompress_failed_at=datetime.utcnow().isoformat())
+                        continue
+                    stats["recompressed_saved"] += saved
+                    if saved and path in files:
+                        files[path] = (size - saved, mtime)
+                    await self._mark(rec, clip_recompressed_at=datetime.utcnow().isoformat())
+
+        # files without a record may still be in flight (save -> encrypt -> POST /event)
+        def in_flight(path):
+            return path not in records and now - files[path][1] < ORPHAN_GRACE_HOURS * 3600
+
+        # 3. age, per event type
+        for path, (size, mtime) in list(files.items()):
+            rec = records.get(path, {})
+            if in_flight(path):
+                continue
+            if now - mtime > retention_days(rec.get("event_type", "unknown")) * DAY:
+                stats["expired_freed"] += await self._delete(path, "expired", files)
+                field = "enc_deleted_at" if path == _key(rec.get("enc_path")) else "clip_deleted_at"
+                await self._mark(rec, **{field: datetime.utcnow().isoformat()})
+
+        # 4. quota: shortest retention first, then oldest
+        quota = STORAGE_QUOTA_GB * 2**30
+        total = sum(size for size, _ in files.values())
+        if quota and total > quota:
+            victims = sorted((kv for kv in files.items() if not in_flight(kv[0])), key=lambda kv: (
+                retention_days(records.get(kv[0], {}).get("event_type", "unknown")), kv[1][1]))
+            for path, _ in victims:
+                if total <= quota:
+                    break
+                rec = records.get(path, {})
+                freed = await self._delete(path, "quota", files)
+                total -= freed
+                stats["quota_freed"] += freed
+                field = "enc_deleted_at" if path == _key(rec.get("enc_path")) else "clip_deleted_at"
+                await self._mark(rec, **{field: datetime.utcnow().isoformat()})
+
+        metrics.STORAGE_BYTES.set(sum(size for size, _ in files.values()))
+        if any(stats.values()):
+            print("[RETENTION]", stats)
+        return stats
+
+    async def run_forever(self, interval=RETENTION_INTERVAL_SECONDS):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print("[RETENTION] pass failed:", e)
+            await asyncio.sleep(interval)
+
+
+retention_manager = RetentionManager()
@@ -0,0 +1,72 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from backend.auth import get_current_user, get_current_admin_user
+from backend.database import events_collection
+from backend.verification import REFRESH_SECONDS, get_ledger
+
+router = APIRouter(prefix="/verify", tags=["verification"])
+
+
+class HashList(BaseModel):
+    hashes: List[str]
+
+
+async def _synced_ledger(sync: bool):
+    """
+    The ledger, synced now if asked, otherwise at most every REFRESH_SECONDS.
+    Each sync also checks the chain binding (rebuilt if it was reset or redeployed).
+    """
+    ledger = get_ledger()
+    await run_in_threadpool(ledger.sync, max_age=0 if sync else REFRESH_SECONDS)
+    return ledger
+
+
+@router.post("/sync")
+async def sync_ledger(user: dict = Depends(get_current_admin_user)):
+    ledger = get_ledger()
+    added = await run_in_threadpool(ledger.sync)
+    return {"status": "success", "new_entries": added, "entries": len(ledger.entries), "last_block": ledger.last_block}
+
+
+@router.get("/ledger")
+async def verify_ledger(anchor: bool = True, user: dict = Depends(get_current_admin_user)):
+    ledger = await _synced_ledger(False)
+    return await run_in_threadpool(ledger.verify_chain, anchor)
+
+
+@router.get("/events")
+async def verify_events(sync: bool = False, check_files: bool = True, user: dict = Depends(get_current_user)):
+    """Verify every stored event (admin) or the caller's own events against the ledger."""
+    ledger = await _synced_ledger(sync and user["role"] == "admin")
+    query = {} if user["role"] == "admin" else {"user": user["username"]}
+    records = [doc async for doc in events_collection.find(query, {"_id": 0, "hash": 1, "enc_path": 1, "tx_hash": 1})]
+    results = await run_in_threadpool(ledger.verify_records, records, check_files)
+
+    summary = {}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    return {"count": len(results), "summary": summary, "results": results}
+
+
+@router.post("")
+async def verify_hashes(body: HashList, sync: bool = False, user: dict = Depends(get_current_user)):
+    ledger = await _synced_ledger(sync and user["role"] == "admin")
+    found = ledger.verify_hashes(body.hashes)
+    return {
+        "count": len(found),
+        "verified": sum(1 for e in found.values() if e),
+        "results": [{"hash": h, "verified": e is not None, "entry": e} for h, e in found.items()],
+    }
+
+
+@router.get("/{clip_hash}")
+async def verify_hash(clip_hash: str, sync: bool = False, user: dict = Depends(get_current_user)):
+    ledger = await _synced_ledger(sync and user["role"] == "admin")
+    entry = ledger.lookup(clip_hash)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Hash not found in evidence ledger")
+    return {"verified": True, "entry": entry}
@@ -0,0 +1,247 @@
+"""
+Local evidence ledger: verify clips without one RPC call per clip.
+
+`Logged` events from the EvidenceLog contract are pulled incrementally with
+batched eth_getLogs ranges and appended to an append-only JSONL hash chain
+(backend/chain/ledger.jsonl). Each entry links to the previous one:
+
+    link = sha256(prev_link | index | hash | tx_hash | block | log_index | timestamp | reporter)
+
+so any edit, reorder or deletion of local entries breaks the chain. An
+in-memory index maps clip hash -> entry, so bulk verification is a local
+lookup (plus a local file hash when checking files on disk).
+
+The state file binds the ledger to a chain id, contract address and the
+hash of the last synced block. If any of them no longer matches (Ganache
+restart, contract redeploy), the old ledger is moved aside and rebuilt
+from the new chain instead of serving hashes from a chain that is gone.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.blockchain import CHAIN_DIR, compute_sha256_file, get_chain
+
+LEDGER_PATH = os.getenv("EVIDENCE_LEDGER_PATH", os.path.join(CHAIN_DIR, "ledger.jsonl"))
+STATE_PATH = LEDGER_PATH + ".state.json"
+START_BLOCK = int(os.getenv("EVIDENCE_START_BLOCK", 0))      # contract deployment block
+LOGS_BATCH_BLOCKS = int(os.getenv("EVIDENCE_LOGS_BATCH", 2000))
+REFRESH_SECONDS = float(os.getenv("EVIDENCE_LEDGER_REFRESH_SECONDS", 30))   # background freshness for lookups
+HASH_WORKERS = int(os.getenv("VERIFY_HASH_WORKERS", 8))
+GENESIS_LINK = "0" * 64
+
+LINK_FIELDS = ("index", "hash", "tx_hash", "block", "log_index", "timestamp", "reporter")
+
+
+def normalize_hash(h):
+    h = h.hex() if isinstance(h, (bytes, bytearray)) else str(h)
+    h = h.lower()
+    return h[2:] if h.startswith("0x") else h
+
+
+def compute_link(prev, entry):
+    data = "|".join([prev] + [str(entry[f]) for f in LINK_FIELDS])
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class EvidenceLedger:
+    def __init__(self, path=LEDGER_PATH, state_path=STATE_PATH):
+        self.path = path
+        self.state_path = state_path
+        self.entries = []
+        self.by_hash = {}      # clip hash -> first entry logging it
+        self.by_index = {}     # contract event id -> entry
+        self.last_block = START_BLOCK - 1
+        self.binding = None    # {"chain_id", "contract", "block_hash"} the entries were synced from
+        self.synced_at = float("-inf")   # monotonic time of the last completed sync
+        self._lock = threading.RLock()
+        self._load()
+
+    # ------------------ persistence ------------------
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.last_block = state.get("last_block", self.last_block)
+            if state.get("chain_id") is not None:
+                self.binding = {k: state.get(k) for k in ("chain_id", "contract", "block_hash")}
+        if self.entries:
+            self.last_block = max(self.last_block, self.entries[-1]["block"])
+
+    def _index(self, entry):
+        self.entries.append(entry)
+        self.by_index[entry["index"]] = entry
+        self.by_hash.setdefault(entry["hash"], entry)
+
+    def _append(self, new_entries, last_block, binding):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in new_entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in new_entries:
+            self._index(entry)
+
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"last_block": last_block, **binding}, f)
+        os.replace(tmp, self.state_path)
+        self.last_block = last_block
+        self.binding = binding
+
+    def _reset(self, reason):
+        """Move the ledger and its state aside and start empty."""
+        print(f"[LEDGER] {reason}; rebuilding the evidence ledger")
+        suffix = f".stale-{int(time.time())}"
+        for path in (self.path, self.state_path):
+            if os.path.exists(path):
+                os.replace(path, path + suffix)
+        self.entries, self.by_hash, self.by_index = [], {}, {}
+        self.last_block = START_BLOCK - 1
+        self.binding = None
+
+    # ------------------ chain binding ------------------
+    def check_chain(self, head=None):
+        """
+        Drop the local ledger if it was synced from another chain or contract,
+        or the chain was reset under it. Returns True if it was dropped.
+        """
+        w3, _, contract = get_chain()
+        with self._lock:
+            if self.last_block < START_BLOCK and not self.entries:
+                return False
+            b = self.binding
+            head = w3.eth.block_number if head is None else head
+            if b is None:
+                reason = "ledger has no chain binding"
+            elif b["chain_id"] != w3.eth.chain_id or b["contract"].lower() != contract.address.lower():
+                reason = f"ledger belongs to chain {b['chain_id']} / {b['contract']}"
+            elif self.last_block > head:
+                reason = f"chain head {head} is behind the ledger ({self.last_block})"
+            elif normalize_hash(w3.eth.get_block(self.last_block)["hash"]) != b["block_hash"]:
+                reason = f"block {self.last_block} no longer matches the ledger"
+            else:
+                return False
+            self._reset(reason)
+            return True
+
+    # ------------------ chain sync ------------------
+    def sync(self, batch_blocks=LOGS_BATCH_BLOCKS, max_age=0):
+        """
+        Pull Logged events since the last synced block; returns the number of new entries.
+
+        With max_age, a ledger synced less than max_age seconds ago is returned
+        as is, without any RPC (chain check included).
+        """
+        with self._lock:
+            if max_age and time.monotonic() - self.synced_at < max_age:
+                return 0
+            w3, _, contract = get_chain()
+            head = w3.eth.block_number
+            self.check_chain(head)
+            chain = {"chain_id": w3.eth.chain_id, "contract": contract.address}
+            added = 0
+            start = self.last_block + 1
+            while start <= head:
+                end = min(start + batch_blocks - 1, head)
+                logs = contract.events.Logged.get_logs(fromBlock=start, toBlock=end)
+                logs = sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"]))
+
+                prev = self.entries[-1]["link"] if self.entries else GENESIS_LINK
+                batch = []
+                for log in logs:
+                    args = log["args"]
+                    if args["id"] in self.by_index:
+                        continue
+                    entry = {
+                        "index": int(args["id"]),
+                        "hash": normalize_hash(args["hash"]),
+                        "tx_hash": normalize_hash(log["transactionHash"]),
+                        "block": int(log["blockNumber"]),
+                        "log_index": int(log["logIndex"]),
+                        "timestamp": int(args["timestamp"]),
+                        "reporter": args["reporter"],
+                        "prev": prev,
+                    }
+                    entry["link"] = prev = compute_link(prev, entry)
+                    batch.append(entry)
+
+                block_hash = normalize_hash(w3.eth.get_block(end)["hash"])
+                self._append(batch, end, {**chain, "block_hash": block_hash})
+                added += len(batch)
+                start = end + 1
+            self.synced_at = time.monotonic()
+            return added
+
+    # ------------------ verification ------------------
+    def lookup(self, clip_hash):
+        return self.by_hash.get(normalize_hash(clip_hash))
+
+    def verify_hashes(self, hashes):
+        """Map each hash to its ledger entry (or None); no RPC."""
+        return {h: self.lookup(h) for h in hashes}
+
+    def verify_records(self, records, check_files=True):
+        """
+        Verify event records ({hash, enc_path, tx_hash, ...}) in bulk.
+
+        Status per record: verified | not_on_chain | tx_mismatch | missing_file | file_mismatch
+        """
+        def check(record):
+            h = normalize_hash(record.get("hash", ""))
+            entry = self.by_hash.get(h)
+            result = {"hash": h, "enc_path": record.get("enc_path"), "entry": entry}
+            if entry is None:
+                result["status"] = "not_on_chain"
+            elif record.get("tx_hash") and normalize_hash(record["tx_hash"]) != entry["tx_hash"]:
+                result["status"] = "tx_mismatch"
+            elif check_files and not (record.get("enc_path") and os.path.exists(record["enc_path"])):
+                result["status"] = "missing_file"
+            elif check_files and compute_sha256_file(record["enc_path"]) != h:
+                result["status"] = "file_mismatch"
+            else:
+                result["status"] = "verified"
+            return result
+
+        # file hashing is I/O bound and hashlib releases the GIL on large buffers
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            return list(pool.map(check, records))
+
+    def verify_chain(self, anchor=True):
+        """Recompute every link; optionally anchor the head entry against the contract (one RPC)."""
+        with self._lock:
+            prev = GENESIS_LINK
+            for pos, entry in enumerate(self.entries):
+                if entry["prev"] != prev or compute_link(prev, entry) != entry["link"]:
+                    return {"ok": False, "entries": len(self.entries), "broken_at": pos}
+                prev = entry["link"]
+
+            result = {"ok": True, "entries": len(self.entries), "head": prev, "last_block": self.last_block}
+            if anchor and self.entries:
+                _, _, contract = get_chain()
+                head = self.entries[-1]
+                on_chain_hash = normalize_hash(contract.functions.getEvent(head["index"]).call()[0])
+                result["anchored"] = on_chain_hash == head["hash"]
+                result["ok"] = result["anchored"]
+            return result
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger():
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = EvidenceLedger()
+    return _ledger
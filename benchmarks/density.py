@@ -0,0 +1,66 @@
+"""
+Latency of crowd clustering (AI/density.py) vs. people per frame.
+
+Synthetic frames place people in a few Gaussian crowds plus uniform
+background walkers; reports mean / p99 milliseconds per frame.
+
+Usage (from the repo root):
+    python -m benchmarks.density --people 50 100 300 1000 --crowds 3 --json
+"""
+import json
+import time
+import argparse
+
+import numpy as np
+
+from AI.density import find_clusters
+
+
+def synth_boxes(rng, people, crowds, width, height):
+    centers = rng.uniform([0.1 * width, 0.2 * height], [0.9 * width, 0.9 * height], (crowds, 2))
+    in_crowd = people * 2 // 3
+    pts = centers[rng.integers(0, crowds, in_crowd)] + rng.normal(0, 0.03 * width, (in_crowd, 2))
+    pts = np.vstack([pts, rng.uniform([0, 0], [width, height], (people - in_crowd, 2))])
+    h = rng.uniform(0.08, 0.15, people) * height
+    half = np.stack([h * 0.2, h / 2], axis=1)         # person box ~0.4 x 1 of its height
+    return np.hstack([pts - half, pts + half])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crowd density clustering")
+    parser.add_argument("--people", nargs="+", type=int, default=[10, 50, 100, 300, 500, 1000])
+    parser.add_argument("--crowds", type=int, default=3)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = []
+    for people in args.people:
+        frames = [synth_boxes(rng, people, args.crowds, args.width, args.height) for _ in range(args.frames)]
+        latencies, found = [], []
+        for boxes in frames:
+            start = time.perf_counter()
+            clusters = find_clusters(boxes, (args.height, args.width), min_size=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(len(clusters))
+        ms = np.array(latencies)
+        results.append({
+            "people": people,
+            "mean_ms": float(ms.mean()),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "avg_clusters": float(np.mean(found)),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'people':>7} {'mean ms':>8} {'p99 ms':>8} {'clusters':>9}")
+    for r in results:
+        print(f"{r['people']:>7} {r['mean_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['avg_clusters']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Import-time profile for the backend and AI modules.
+
+Runs each module import in a fresh interpreter with `python -X importtime`
+and reports wall time plus the slowest imports.
+
+Usage (from the repo root):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules backend.main --top 15 --json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DEFAULT_MODULES = ["backend.main", "AI.detect_clip_upload", "AI.detect_and_send", "backend.blockchain"]
+
+
+def profile_import(module):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            imports.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+
+    errors = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "wall_ms": round(wall_ms, 1),
+        "imports": imports,
+        "error": "\n".join(errors[-5:]) if proc.returncode else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold import time")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per module")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    report = []
+    for module in args.modules:
+        res = profile_import(module)
+        top = sorted(res.pop("imports"), key=lambda i: i[2], reverse=True)[:args.top]
+        res["slowest"] = [{"name": n, "self_ms": s / 1000, "cumulative_ms": c / 1000} for n, s, c in top]
+        report.append(res)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for res in report:
+        status = "ok" if res["ok"] else "FAILED"
+        print(f"{res['module']}: {res['wall_ms']:.1f} ms wall ({status})")
+        if res["error"]:
+            print("  " + res["error"].replace("\n", "\n  "))
+        for imp in res["slowest"]:
+            print(f"  {imp['cumulative_ms']:9.1f} ms  {imp['name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compare inference backends (latency + accuracy) on sample clips.
+
+Accuracy is measured against the PyTorch backend at the reference input size:
+person boxes are matched greedily at IoU >= 0.5 per frame, giving precision,
+recall and the mean absolute error of the per-frame person count.
+
+Usage (from the repo root):
+    python -m benchmarks.inference_backends --clips storage/sample.mp4
+    python -m benchmarks.inference_backends --clips a.mp4 b.mp4 --backends torch onnx onnx-int8 --imgsz 640 480 320 --json
+"""
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from AI.inference import BACKENDS, create_detector
+
+
+def load_frames(clips, max_frames):
+    frames = []
+    for clip in clips:
+        cap = cv2.VideoCapture(clip)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    return frames
+
+
+def iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match(pred, ref, thr=0.5):
+    """Greedy IoU matching; returns the number of true positives."""
+    if len(pred) == 0 or len(ref) == 0:
+        return 0
+    ious = iou_matrix(pred, ref)
+    tp = 0
+    while ious.size and ious.max() >= thr:
+        i, j = np.unravel_index(ious.argmax(), ious.shape)
+        ious[i, :] = -1
+        ious[:, j] = -1
+        tp += 1
+    return tp
+
+
+def run_backend(detector, frames, warmup):
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+    latencies, outputs = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        boxes, _ = detector.detect(frame)
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(boxes)
+    return np.array(latencies), outputs
+
+
+def accuracy(outputs, reference):
+    tp = n_pred = n_ref = 0
+    count_err = []
+    for pred, ref in zip(outputs, reference):
+        tp += match(pred, ref)
+        n_pred += len(pred)
+        n_ref += len(ref)
+        count_err.append(abs(len(pred) - len(ref)))
+    return {
+        "precision": tp / n_pred if n_pred else 1.0,
+        "recall": tp / n_ref if n_ref else 1.0,
+        "count_mae": float(np.mean(count_err)) if count_err else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark person-detection backends")
+    parser.add_argument("--clips", nargs="+", required=True)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[640])
+    parser.add_argument("--reference-imgsz", type=int, default=640)
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    frames = load_frames(args.clips, args.max_frames)
+    if not frames:
+        raise SystemExit("No frames decoded from --clips")
+
+    _, reference = run_backend(create_detector("torch", args.reference_imgsz), frames, args.warmup)
+
+    results = []
+    for backend in args.backends:
+        for imgsz in args.imgsz:
+            latencies, outputs = run_backend(create_detector(backend, imgsz), frames, args.warmup)
+            results.append({
+                "backend": backend,
+                "imgsz": imgsz,
+                "frames": len(frames),
+                "mean_ms": float(latencies.mean()),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "fps": float(1000 / latencies.mean()),
+                **accuracy(outputs, reference),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'backend':<10} {'imgsz':>5} {'mean ms':>8} {'p95 ms':>8} {'fps':>7} {'prec':>6} {'recall':>6} {'cnt MAE':>7}")
+    for r in results:
+        print(f"{r['backend']:<10} {r['imgsz']:>5} {r['mean_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['fps']:>7.1f} "
+              f"{r['precision']:>6.3f} {r['recall']:>6.3f} {r['count_mae']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Offline, headless benchmark of the detection pipeline.
+
+Replays recorded clips and/or generated synthetic clips (simple stick-figure
+"people" moving over a noisy background) through the same stage functions
+as AI/detect_and_send.py, and reports per-stage latency percentiles
+(decode, yolo, features, pose, clip_save, encrypt, hash, post), throughput
+and peak RSS as JSON.
+
+A COCO detector won't reliably see stick figures as people, so on synthetic
+clips the downstream stages (features, clustering, pose, scoring) are fed
+the generated ground-truth boxes; YOLO still runs on every frame and its
+person count is reported next to the requested one (detected_per_frame).
+
+Events are forced every --event-every frames so the sink stages are always
+measured; posts go to a local stub server unless --backend-url is given.
+
+Usage (from the repo root):
+    python -m benchmarks.pipeline --people 20 --frames 300 --out bench.json
+    python -m benchmarks.pipeline --clips storage/*.mp4 --analyze-clip --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import platform
+import shutil
+import contextlib
+import tempfile
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+# detect_and_send refuses to import without a key; benchmarks don't need a real one
+os.environ.setdefault("AES_KEY", base64.b64encode(os.urandom(32)).decode())
+
+from AI import detect_and_send as pipeline
+from AI.inference import INFERENCE_BACKEND, INFERENCE_IMGSZ, get_detector
+
+STAGES = ["decode", "yolo", "features", "pose", "scoring", "clip_save", "encrypt", "hash", "post"]
+
+
+# ------------------ Inputs ------------------
+def synth_clip(path, people, frames, width, height, fps, seed=0):
+    """
+    Write a clip with `people` stick figures bouncing around the frame.
+
+    Returns the ground-truth person boxes per frame, each (people, 4) xyxy.
+    """
+    rng = np.random.default_rng(seed)
+    size = rng.uniform(0.15, 0.3, people) * height          # figure height in px
+    pos = rng.uniform([0.05 * width, 0.3 * height], [0.95 * width, 0.9 * height], (people, 2))
+    vel = rng.normal(0, 3, (people, 2))
+    colors = rng.integers(0, 255, (people, 3)).tolist()
+    background = rng.integers(90, 140, (height, width, 3), dtype=np.uint8)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    truth = []
+    for _ in range(frames):
+        img = background.copy()
+        pos += vel
+        out = (pos < [0, size.max() * 0.5]) | (pos > [width, height])
+        vel[out] *= -1
+        pos = np.clip(pos, [0, size.max() * 0.5], [width, height])
+        for (x, y), s, color in zip(pos.astype(int), size, colors):
+            s = int(s)
+            head, neck, hip = (x, y - s + s // 8), (x, y - s + s // 4), (x, y - s // 2)
+            cv2.circle(img, head, max(2, s // 8), color, -1)
+            cv2.line(img, neck, hip, color, max(2, s // 10))
+            cv2.line(img, neck, (x - s // 4, y - s // 2), color, max(1, s // 20))
+            cv2.line(img, neck, (x + s // 4, y - s // 2), color, max(1, s // 20))
+            cv2.line(img, hip, (x - s // 6, y), color, max(1, s // 16))
+            cv2.line(img, hip, (x + s // 6, y), color, max(1, s // 16))
+        writer.write(img)
+        x, y = pos.astype(int).T
+        truth.append(np.stack([x - size // 4, y - size, x + size // 4, y], axis=1).astype(np.float32))
+    writer.release()
+    return truth
+
+
+class _StubBackend(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"status": "success", "tx_hash": "0x0"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_backend():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubBackend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ------------------ Measurement ------------------
+class Timings:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        out = {}
+        for stage, values in self.samples.items():
+            ms = np.array(values) * 1000
+            out[stage] = {
+                "count": len(ms),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p90_ms": float(np.percentile(ms, 90)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+                "total_s": float(ms.sum() / 1000),
+            }
+        return out
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KiB on Linux
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20            # Windows
+
+
+# ------------------ Pipeline replay ------------------
+def _features(boxes, last_centroids, frame_shape):
+    persons, centroids, avg_speed = pipeline.person_features(boxes, last_centroids)
+    mob = bool(pipeline.mob_clusters(persons, frame_shape))
+    return persons, centroids, mob, pipeline.melee_speed(persons, avg_speed)
+
+
+def run_clip(path, timings, detector, pose_detector, args, workdir, state, truth=None):
+    """Replay one clip; with `truth` (boxes per frame) downstream stages use it instead of detections."""
+    cap = cv2.VideoCapture(path)
+    fps = int(cap.get(cv2.CAP_PROP_FPS) or 0) or pipeline.FPS
+    buf = deque(maxlen=pipeline.BUFFER_SIZE)
+    last_centroids = {}
+    scorer = pipeline.EventScorer(pipeline.build_event_rules(), window_seconds=pipeline.EVENT_WINDOW_SECONDS)
+
+    frame_idx = 0
+    while True:
+        ret, frame = timings.time("decode", cap.read)
+        if not ret:
+            break
+        frame_idx += 1
+        state["frames"] += 1
+        buf.append(frame.copy())
+
+        boxes, _ = timings.time("yolo", detector.detect, frame)
+        state["detected"] += len(boxes)
+        if truth is not None:
+            boxes = truth[min(frame_idx, len(truth)) - 1]
+        persons, centroids, mob, speed = timings.time("features", _features, boxes, last_centroids, frame.shape)
+        pose = False
+        if persons or args.always_pose:
+            pose = timings.time("pose", pipeline.detect_suspicious_pose, pose_detector, frame)
+        timings.time("scoring", scorer.update, state["frames"] / fps, len(persons), speed, mob, pose)
+        last_centroids = {i: c for i, c in enumerate(centroids)}
+        state["persons"] += len(persons)
+
+        if args.event_every and state["frames"] % args.event_every == 0:
+            clip_path = os.path.join(workdir, f"event_{state['events']}.mp4")
+            enc_path = clip_path + ".enc"
+            timings.time("clip_save", pipeline.save_clip, list(buf), clip_path, fps=fps)
+            timings.time("encrypt", pipeline.encrypt_file, clip_path, enc_path)
+            hash_hex = timings.time("hash", pipeline.compute_sha256_file, enc_path)
+            state["bytes_encrypted"] += os.path.getsize(clip_path)
+            payload = {
+                "camera_id": "bench", "event_type": "benchmark", "confidence": 0.0,
+                "start_time": "", "end_time": "", "clip_path": clip_path, "enc_path": enc_path, "hash": hash_hex,
+            }
+            timings.time("post", pipeline.post_event, payload)
+            state["events"] += 1
+            os.remove(clip_path)
+            os.remove(enc_path)
+
+    cap.release()
+
+
+def compare(current, previous):
+    print(f"{'stage':<14} {'p50 ms':>9} {'prev':>9} {'delta':>8}   {'p99 ms':>9} {'prev':>9} {'delta':>8}")
+    for stage in sorted(set(current["stages"]) | set(previous["stages"])):
+        cur, prev = current["stages"].get(stage), previous["stages"].get(stage)
+        if not cur or not prev:
+            continue
+        row = [stage]
+        for key in ("p50_ms", "p99_ms"):
+            delta = (cur[key] - prev[key]) / prev[key] * 100 if prev[key] else 0.0
+            row += [f"{cur[key]:9.2f}", f"{prev[key]:9.2f}", f"{delta:+7.1f}%"]
+        print(f"{row[0]:<14} {row[1]} {row[2]} {row[3]}   {row[4]} {row[5]} {row[6]}")
+    print(f"throughput: {current['throughput_fps']:.1f} fps (prev {previous['throughput_fps']:.1f})  "
+          f"peak RSS: {current['peak_rss_mb']:.0f} MB (prev {previous['peak_rss_mb']:.0f})")
+
+
+def run(args, workdir):
+    inputs = [{"path": path, "people": None, "truth": None} for path in args.clips]
+    people_counts = args.people or ([] if args.clips else [10])
+    for i, people in enumerate(people_counts):
+        path = os.path.join(workdir, f"synthetic_{people}p.mp4")
+        truth = synth_clip(path, people, args.frames, args.width, args.height, args.fps, seed=i)
+        inputs.append({"path": path, "people": people, "truth": truth})
+
+    server = None
+    if args.backend_url:
+        pipeline.BACKEND_URL = args.backend_url
+    else:
+        server, pipeline.BACKEND_URL = start_stub_backend()
+
+    # model loading is not part of the measured pipeline
+    detector = get_detector()
+    pose_detector = pipeline.get_pose_detector()
+
+    timings = Timings()
+    state = {"frames": 0, "persons": 0, "detected": 0, "events": 0, "bytes_encrypted": 0}
+    per_input = []
+    # keep stdout for the JSON report; pipeline logging goes to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        for _ in range(args.loops):
+            for item in inputs:
+                before = dict(state)
+                run_clip(item["path"], timings, detector, pose_detector, args, workdir, state, item["truth"])
+                frames = state["frames"] - before["frames"]
+                per_input.append({
+                    "path": os.path.basename(item["path"]) if item["people"] is not None else item["path"],
+                    "people": item["people"],
+                    "frames": frames,
+                    "persons_per_frame": (state["persons"] - before["persons"]) / frames if frames else 0.0,
+                    "detected_per_frame": (state["detected"] - before["detected"]) / frames if frames else 0.0,
+                })
+        wall = time.perf_counter() - start
+
+        if args.analyze_clip:
+            from AI.detect_clip_upload import analyze_clip
+            for item in inputs:
+                timings.time("analyze_clip", analyze_clip, item["path"])
+
+    if server:
+        server.shutdown()
+
+    stages = timings.summary()
+    encrypt_s = stages.get("encrypt", {}).get("total_s", 0)
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "inputs": per_input[:len(inputs)],
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "inference_backend": INFERENCE_BACKEND,
+            "inference_imgsz": INFERENCE_IMGSZ,
+        },
+        "frames": state["frames"],
+        "events": state["events"],
+        "avg_persons_per_frame": state["persons"] / state["frames"] if state["frames"] else 0.0,
+        "avg_detected_per_frame": state["detected"] / state["frames"] if state["frames"] else 0.0,
+        "wall_s": wall,
+        "throughput_fps": state["frames"] / wall if wall else 0.0,
+        "encrypt_mb_per_s": state["bytes_encrypted"] / 2**20 / encrypt_s if encrypt_s else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {s: stages[s] for s in STAGES + ["analyze_clip"] if s in stages},
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless detection pipeline benchmark")
+    parser.add_argument("--clips", nargs="*", default=[], help="recorded clips to replay")
+    parser.add_argument("--people", type=int, nargs="+", help="people per synthetic clip, one clip each (default 10 without --clips)")
+    parser.add_argument("--frames", type=int, default=200, help="frames per synthetic clip")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=20)
+    parser.add_argument("--loops", type=int, default=1, help="replay every input this many times")
+    parser.add_argument("--event-every", type=int, default=100, help="force an event every N frames (0 = never)")
+    parser.add_argument("--always-pose", action="store_true", help="run pose even when no person is detected")
+    parser.add_argument("--analyze-clip", action="store_true", help="also time AI.detect_clip_upload.analyze_clip per clip")
+    parser.add_argument("--backend-url", help="post to a real backend instead of the local stub")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON report to diff against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ims_bench_")
+    try:
+        report = run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
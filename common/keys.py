@@ -0,0 +1,21 @@
+"""
+AES key shared by the detector (encrypts clips) and the backend (verifies
+encrypted copies before releasing plaintext).
+
+Kept outside AI/ and backend/ so neither layer imports the other for it.
+"""
+import os
+import base64
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env")
+
+
+def load_aes_key():
+    """The 256-bit AES-GCM key, base64 encoded in AES_KEY (environment or .env)."""
+    key_b64 = os.getenv("AES_KEY")
+    if not key_b64:
+        raise RuntimeError("Set AES_KEY in .env (base64 encoded 256-bit key)")
+    return base64.b64decode(key_b64)
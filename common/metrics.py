@@ -0,0 +1,220 @@
+"""
+Minimal Prometheus-style metrics shared by the detector and the backend.
+
+Counters, gauges and histograms with labels, rendered in the Prometheus text
+exposition format. Hot-path cost is one dict lookup (cache the result of
+.labels(...) outside loops to skip it) plus an uncontended lock per update.
+
+Backend: served at GET /metrics (backend/main.py).
+Detector: start_http_server(port) runs a tiny exporter thread.
+Kept outside AI/ and backend/ so neither layer imports the other for it.
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ------------------ Registry ------------------
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# ------------------ Children (one per label set) ------------------
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+# ------------------ Metric types ------------------
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+        registry.register(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values, **kwargs):
+        key = tuple(str(v) for v in values) if values else tuple(str(kwargs[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        return [f"{self.name}{_fmt_labels(self.labelnames, key)} {child.value}"
+                for key, child in list(self._children.items())]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _Histogram(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def samples(self):
+        out = []
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {child.sum}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {child.count}")
+        return out
+
+
+def render():
+    return REGISTRY.render()
+
+
+# ------------------ Detector exporter ------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port, addr="0.0.0.0"):
+    """Serve GET /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
+
+
+# ------------------ Metric catalog ------------------
+# Detector
+FRAMES = Counter("ims_frames_total", "Frames processed", ["camera"])
+DROPPED_FRAMES = Counter("ims_dropped_frames_total", "Live frames dropped because detection fell behind", ["camera"])
+CAMERA_FPS = Gauge("ims_camera_fps", "Processed frames per second", ["camera"])
+QUEUE_DEPTH = Gauge("ims_queue_depth", "Live frames captured but not yet processed", ["camera", "queue"])
+INFERENCE_SECONDS = Histogram("ims_inference_seconds", "Person detection latency per frame", ["camera", "backend"])
+EVENTS = Counter("ims_events_total", "Events emitted", ["camera", "event_type"])
+EVENT_POST_SECONDS = Histogram("ims_event_post_seconds", "POST /event latency from the detector")
+
+# Evidence processing (rate = bytes_total / seconds_total)
+ENCRYPT_BYTES = Counter("ims_encrypt_bytes_total", "Plaintext bytes encrypted")
+ENCRYPT_SECONDS = Counter("ims_encrypt_seconds_total", "Time spent encrypting")
+HASH_BYTES = Counter("ims_hash_bytes_total", "Bytes hashed with SHA-256")
+HASH_SECONDS = Counter("ims_hash_seconds_total", "Time spent hashing")
+
+# Backend
+CHAIN_TX_SECONDS = Histogram("ims_chain_tx_seconds", "logEvent transaction latency (send + receipt)", ["status"])
+CHAIN_TX_PENDING = Gauge("ims_chain_tx_pending", "logEvent transactions awaiting a receipt")
+MONGO_COMMAND_SECONDS = Histogram("ims_mongo_command_seconds", "MongoDB command latency", ["command", "status"])
+HTTP_REQUEST_SECONDS = Histogram("ims_http_request_seconds", "HTTP handler latency", ["method", "route", "status"])
+STORAGE_BYTES = Gauge("ims_storage_bytes", "Bytes of clips in storage/ after the last retention pass")
+RETENTION_DELETED_BYTES = Counter("ims_retention_deleted_bytes_total", "Clip bytes deleted by retention", ["reason"])
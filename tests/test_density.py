@@ -0,0 +1,71 @@
+"""Grid crowd clustering (AI/density.py) against a brute-force radius graph."""
+import os
+import base64
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("AES_KEY", base64.b64encode(os.urandom(32)).decode())
+
+from AI import density  # noqa: E402
+from AI.detect_and_send import mob_clusters  # noqa: E402
+
+
+def brute_force_labels(points, radius):
+    """Smallest member index per node in the graph joining all pairs within radius."""
+    d = points[:, None, :] - points[None, :, :]
+    adjacent = np.einsum("ijk,ijk->ij", d, d) <= radius * radius
+    labels = np.full(len(points), -1)
+    for start in range(len(points)):
+        if labels[start] >= 0:
+            continue
+        stack = [start]
+        labels[start] = start
+        while stack:
+            for j in np.flatnonzero(adjacent[stack.pop()] & (labels < 0)):
+                labels[j] = start
+                stack.append(j)
+    return labels
+
+
+def max_cell_count(points, radius):
+    _, counts = np.unique(np.floor(points / (radius / np.sqrt(2))), axis=0, return_counts=True)
+    return counts.max()
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_components_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 300))
+    extent = float(rng.choice([50, 200, 1000, 4000]))
+    points = rng.uniform(0, extent, (n, 2))
+    if seed % 2:   # a few tight blobs among scattered points
+        blobs = rng.uniform(0, extent, (4, 2))
+        points[: n // 2] = blobs[rng.integers(0, 4, n // 2)] + rng.normal(0, extent / 100, (n // 2, 2))
+    radius = float(rng.uniform(5, 120))
+    expected = brute_force_labels(points, radius)
+
+    uncapped = density.connected_labels(n, *density.neighbor_pairs(points, radius, max_per_cell=n))
+    np.testing.assert_array_equal(uncapped, expected)
+
+    if max_cell_count(points, radius) <= density.MAX_POINTS_PER_CELL:
+        capped = density.connected_labels(n, *density.neighbor_pairs(points, radius))
+        np.testing.assert_array_equal(capped, expected)
+
+
+def person(cx, cy, h=100):
+    return [cx - h / 4, cy - h / 2, cx + h / 4, cy + h / 2]
+
+
+def test_one_outlier_does_not_hide_a_compact_crowd():
+    frame = (1080, 1920, 3)
+    crowd = [person(300 + 40 * k, 500 + 10 * (k % 2)) for k in range(6)]
+    outlier = [person(1800, 100)]
+
+    # the bounding box of everyone covers most of the frame, the crowd's does not
+    clusters = mob_clusters(np.array(crowd + outlier), frame)
+
+    assert len(clusters) == 1
+    assert clusters[0]["size"] == 6
+    assert clusters[0]["area_ratio"] < 0.02
+    assert mob_clusters(np.array(crowd[:4] + outlier), frame) == []
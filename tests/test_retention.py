@@ -0,0 +1,174 @@
+"""Retention passes against a temp storage dir and an in-memory events collection."""
+import os
+import time
+import base64
+import asyncio
+import hashlib
+
+import pytest
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+os.environ.setdefault("AES_KEY", base64.b64encode(os.urandom(32)).decode())
+
+from backend import retention  # noqa: E402
+
+DAY = 86400
+
+
+class FakeCollection:
+    """The subset of the motor collection API that retention uses."""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(d, _id=i) for i, d in enumerate(docs)]
+
+    def find(self, query=None, projection=None):
+        async def gen():
+            for doc in self.docs:
+                yield dict(doc)
+        return gen()
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if doc["_id"] == query["_id"]:
+                doc.update(update["$set"])
+
+    def get(self, clip_path):
+        return next(d for d in self.docs if d.get("clip_path") == clip_path)
+
+
+def write(path, data, age_days=0):
+    with open(path, "wb") as f:
+        f.write(data)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def write_event(storage, name, event_type="melee", size=1000, age_days=0, tamper=False):
+    """Raw clip + encrypted copy + the record /event would store."""
+    plaintext = os.urandom(size)
+    nonce = os.urandom(12)
+    blob = nonce + AESGCM(retention.AES_KEY).encrypt(nonce, plaintext, None)
+    clip = write(storage / f"{name}.mp4", plaintext, age_days)
+    enc = write(storage / f"{name}.mp4.enc", blob[:-1] + bytes([blob[-1] ^ 1]) if tamper else blob, age_days)
+    return {"event_type": event_type, "clip_path": clip, "enc_path": enc, "hash": hashlib.sha256(blob).hexdigest()}
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(retention, "DELETE_PLAINTEXT", True)
+    monkeypatch.setattr(retention, "RETENTION_DAYS", 0)
+    monkeypatch.setattr(retention, "STORAGE_QUOTA_GB", 0)
+    monkeypatch.setattr(retention, "RECOMPRESS_AFTER_DAYS", 0)
+    monkeypatch.setattr(retention, "ORPHAN_GRACE_HOURS", 24)
+    return tmp_path
+
+
+def run_pass(storage, monkeypatch, docs):
+    events = FakeCollection(docs)
+    monkeypatch.setattr(retention, "events_collection", events)
+    stats = asyncio.run(retention.RetentionManager(str(storage), io_rate_mbps=0).run_once())
+    return stats, events
+
+
+def test_plaintext_released_only_after_encrypted_copy_verifies(storage, monkeypatch):
+    good = write_event(storage, "good")
+    bad = write_event(storage, "bad", tamper=True)
+
+    stats, events = run_pass(storage, monkeypatch, [good, bad])
+
+    assert not os.path.exists(good["clip_path"]) and os.path.exists(good["enc_path"])
+    assert "clip_deleted_at" in events.get(good["clip_path"])
+    assert os.path.exists(bad["clip_path"])
+    assert "clip_verify_failed_at" in events.get(bad["clip_path"])
+    assert stats["plaintext_freed"] == 1000
+
+
+def test_age_limit_per_event_type(storage, monkeypatch):
+    monkeypatch.setattr(retention, "DELETE_PLAINTEXT", False)
+    monkeypatch.setattr(retention, "RETENTION_DAYS", 30)
+    monkeypatch.setenv("RETENTION_DAYS_UNKNOWN", "7")
+    unknown = write_event(storage, "unknown", event_type="unknown", age_days=10)
+    melee = write_event(storage, "melee", event_type="melee", age_days=10)
+
+    run_pass(storage, monkeypatch, [unknown, melee])
+
+    assert not os.path.exists(unknown["clip_path"]) and not os.path.exists(unknown["enc_path"])
+    assert os.path.exists(melee["clip_path"]) and os.path.exists(melee["enc_path"])
+
+
+def test_quota_evicts_shortest_retention_then_oldest(storage, monkeypatch):
+    monkeypatch.setattr(retention, "DELETE_PLAINTEXT", False)
+    monkeypatch.setattr(retention, "STORAGE_QUOTA_GB", 1500 / 2**30)
+    monkeypatch.setenv("RETENTION_DAYS_UNKNOWN", "7")
+    monkeypatch.setenv("RETENTION_DAYS_MELEE", "90")
+    old_melee = write_event(storage, "old_melee", event_type="melee", size=500, age_days=3)
+    new_melee = write_event(storage, "new_melee", event_type="melee", size=500, age_days=1)
+    unknown = write_event(storage, "unknown", event_type="unknown", size=500, age_days=0)
+
+    stats, _ = run_pass(storage, monkeypatch, [old_melee, new_melee, unknown])
+
+    assert not os.path.exists(unknown["clip_path"]) and not os.path.exists(unknown["enc_path"])
+    assert not os.path.exists(old_melee["clip_path"]) and not os.path.exists(old_melee["enc_path"])
+    assert os.path.exists(new_melee["clip_path"]) and os.path.exists(new_melee["enc_path"])
+    assert stats["quota_freed"] > 0
+
+
+def test_files_without_a_record_are_kept_during_grace_period(storage, monkeypatch):
+    monkeypatch.setattr(retention, "RETENTION_DAYS", 1)
+    monkeypatch.setattr(retention, "STORAGE_QUOTA_GB", 1 / 2**30)
+    monkeypatch.setenv("RETENTION_DAYS_UNKNOWN", "0.01")
+    # a clip the detector has just saved and encrypted, before POST /event
+    in_flight = write_event(storage, "in_flight", event_type="unknown", age_days=0.1)
+    orphan = write(storage / "orphan.mp4", os.urandom(100), age_days=2)
+
+    run_pass(storage, monkeypatch, [])
+
+    assert os.path.exists(in_flight["clip_path"]) and os.path.exists(in_flight["enc_path"])
+    assert not os.path.exists(orphan)
+
+
+def test_failed_recompression_is_skipped_and_the_pass_continues(storage, monkeypatch):
+    monkeypatch.setattr(retention, "DELETE_PLAINTEXT", False)
+    monkeypatch.setattr(retention, "RECOMPRESS_AFTER_DAYS", 1)
+    monkeypatch.setattr(retention, "STORAGE_QUOTA_GB", 1500 / 2**30)
+    calls = []
+
+    def broken_recompress(path, limiter):
+        calls.append(path)
+        raise RuntimeError("corrupt clip")
+
+    monkeypatch.setattr(retention, "recompress_clip", broken_recompress)
+    old = write_event(storage, "old", size=500, age_days=3)
+    new = write_event(storage, "new", size=500, age_days=0)
+
+    stats, events = run_pass(storage, monkeypatch, [old, new])
+
+    assert calls == [os.path.realpath(old["clip_path"])]
+    assert "clip_recompress_failed_at" in events.get(old["clip_path"])
+    assert not os.path.exists(old["clip_path"]) and not os.path.exists(old["enc_path"])
+    assert os.path.exists(new["clip_path"]) and os.path.exists(new["enc_path"])
+    assert stats["quota_freed"] == 500 + 528      # clip + enc copy (nonce and tag)
+
+    # marked records are not retried
+    monkeypatch.setattr(retention, "STORAGE_QUOTA_GB", 0)
+    old = write_event(storage, "old", size=500, age_days=3)
+    run_pass(storage, monkeypatch, [dict(old, clip_recompress_failed_at="2024-01-01T00:00:00")])
+    assert len(calls) == 1
+
+
+def test_failed_release_does_not_stop_the_pass(storage, monkeypatch):
+    monkeypatch.setattr(retention, "RETENTION_DAYS", 1)
+
+    def vanished(clip_path, enc_path, expected_hash, limiter):
+        raise FileNotFoundError(enc_path)
+
+    monkeypatch.setattr(retention, "verify_encrypted_copy", vanished)
+    current = write_event(storage, "current")
+    expired = write_event(storage, "expired", age_days=2)
+
+    stats, _ = run_pass(storage, monkeypatch, [current, expired])
+
+    assert os.path.exists(current["clip_path"])
+    assert not os.path.exists(expired["clip_path"]) and not os.path.exists(expired["enc_path"])
+    assert stats["expired_freed"] > 0
@@ -0,0 +1,92 @@
+"""Windowed statistics and event rules (AI/temporal.py)."""
+import numpy as np
+import pytest
+
+from AI.temporal import EventRule, EventScorer, RollingStats
+
+
+def feed(scorer, start, end, fps, **signals):
+    """Push frames at `fps` over [start, end); returns {t: fired events}."""
+    values = {"persons": 0, "speed": 0.0, "mob": False, "pose": False, **signals}
+    fired = {}
+    for i in range(int(round((end - start) * fps))):
+        t = round(start + i / fps, 6)
+        events = scorer.update(t, **values)
+        if events:
+            fired[t] = [e[0] for e in events]
+    return fired
+
+
+def test_rolling_stats_matches_numpy_over_a_time_window():
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.uniform(0.01, 0.2, 500))
+    values = rng.normal(5, 2, 500)
+    stats = RollingStats(2.0)
+    for t, x in zip(times, values):
+        stats.push(t, x)
+        window = values[(times > t - 2.0) & (times <= t)]
+        assert stats.n == len(window)
+        assert stats.mean == pytest.approx(window.mean())
+        assert stats.std == pytest.approx(window.std(), abs=1e-9)
+
+
+def test_window_covers_the_same_time_at_any_frame_rate():
+    fast, slow = RollingStats(2.0), RollingStats(2.0)
+    for i in range(300):
+        fast.push(i / 30, 1)
+    for i in range(80):
+        slow.push(i / 8, 1)
+    assert fast.span == pytest.approx(2.0 - 1 / 30)
+    assert slow.span == pytest.approx(2.0 - 1 / 8)
+
+
+def test_no_event_before_half_a_window_of_stream_time():
+    scorer = EventScorer([EventRule("mob_formation", "mob", 0.6, 0.36, 30, 0.8)], window_seconds=2.0)
+    fired = feed(scorer, 0, 3, fps=8, mob=True)
+    assert min(fired) == pytest.approx(1.0)
+
+
+def test_hysteresis_fires_once_per_activation():
+    scorer = EventScorer([EventRule("melee", "speed", 12, 7.2, 0, 0.9)], window_seconds=1.0)
+    fired = feed(scorer, 0, 5, fps=10, speed=20)
+    assert len(fired) == 1                                  # stays active, no re-fire
+    assert feed(scorer, 5, 6, fps=10, speed=10) == {}       # between exit and enter: still active
+    assert feed(scorer, 6, 8, fps=10, speed=0) == {}        # drops below exit: re-armed
+    assert len(feed(scorer, 8, 10, fps=10, speed=20)) == 1
+
+
+def test_cooldowns_are_per_type():
+    scorer = EventScorer([
+        EventRule("mob_formation", "mob", 0.6, 0.36, 100, 0.8),
+        EventRule("melee", "speed", 12, 7.2, 2, 0.9),
+    ], window_seconds=1.0)
+    feed(scorer, 0, 2, fps=10, speed=20, mob=True)          # both fire
+    feed(scorer, 2, 4, fps=10)                              # both re-arm
+    fired = feed(scorer, 4, 6, fps=10, speed=20, mob=True)
+    assert [e for events in fired.values() for e in events] == ["melee"]
+
+
+def test_activation_during_cooldown_fires_when_it_ends_if_still_active():
+    scorer = EventScorer([EventRule("melee", "speed", 12, 7.2, 5, 0.9)], window_seconds=1.0)
+    first = feed(scorer, 0, 1.5, fps=10, speed=20)
+    feed(scorer, 1.5, 3, fps=10)                            # re-arm
+    fired = feed(scorer, 3, 8, fps=10, speed=20)            # active again from ~3.5 s
+    assert list(fired) == [pytest.approx(min(first) + 5)]
+
+
+def test_activation_that_ends_inside_the_cooldown_is_not_reported():
+    scorer = EventScorer([EventRule("melee", "speed", 12, 7.2, 5, 0.9)], window_seconds=1.0)
+    feed(scorer, 0, 1.5, fps=10, speed=20)
+    feed(scorer, 1.5, 3, fps=10)
+    feed(scorer, 3, 4, fps=10, speed=20)                    # short incident inside the cooldown
+    assert feed(scorer, 4, 10, fps=10) == {}
+
+
+def test_several_types_fire_on_the_same_frame():
+    scorer = EventScorer([
+        EventRule("mob_formation", "mob", 0.6, 0.36, 30, 0.8),
+        EventRule("melee", "speed", 12, 7.2, 30, 0.9),
+        EventRule("suspicious_body_language", "pose", 0.5, 0.3, 30, 0.6),
+    ], window_seconds=2.0)
+    fired = feed(scorer, 0, 3, fps=20, speed=20, mob=True, pose=True)
+    assert list(fired.values()) == [["mob_formation", "melee", "suspicious_body_language"]]
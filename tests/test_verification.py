@@ -0,0 +1,188 @@
+"""Evidence ledger (backend/verification.py) against an in-memory fake chain."""
+import os
+import json
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+from backend import verification
+
+
+class FakeChain:
+    """The web3 calls the ledger makes: eth.chain_id/block_number/get_block and the Logged event."""
+
+    def __init__(self, chain_id=1337, address="0x00000000000000000000000000000000000000Aa"):
+        self.chain_id = chain_id
+        self.address = address
+        self.block_hashes = [os.urandom(32)]   # genesis
+        self.logs = []
+        self.get_logs_calls = []
+
+    def mine(self, *clip_hashes):
+        """One block holding a Logged event per clip hash (hex)."""
+        self.block_hashes.append(os.urandom(32))
+        for pos, h in enumerate(clip_hashes):
+            self.logs.append({
+                "args": {"id": len(self.logs), "hash": bytes.fromhex(h), "timestamp": 1700000000 + len(self.logs),
+                         "reporter": "0x0000000000000000000000000000000000000001"},
+                "transactionHash": os.urandom(32),
+                "blockNumber": self.block_number,
+                "logIndex": pos,
+            })
+
+    @property
+    def block_number(self):
+        return len(self.block_hashes) - 1
+
+    def get_block(self, number):
+        return {"hash": self.block_hashes[number]}
+
+    def get_logs(self, fromBlock, toBlock):
+        self.get_logs_calls.append((fromBlock, toBlock))
+        return [log for log in self.logs if fromBlock <= log["blockNumber"] <= toBlock]
+
+    def get_event(self, index):
+        return SimpleNamespace(call=lambda: (self.logs[index]["args"]["hash"], "", 0, ""))
+
+    def get_chain(self):
+        contract = SimpleNamespace(
+            address=self.address,
+            events=SimpleNamespace(Logged=SimpleNamespace(get_logs=self.get_logs)),
+            functions=SimpleNamespace(getEvent=self.get_event),
+        )
+        return SimpleNamespace(eth=self), None, contract
+
+
+def clip_hash():
+    return os.urandom(32).hex()
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    fake = FakeChain()
+    monkeypatch.setattr(verification, "get_chain", fake.get_chain)
+    return fake
+
+
+@pytest.fixture
+def open_ledger(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    return lambda: verification.EvidenceLedger(path, path + ".state.json")
+
+
+def test_incremental_batched_sync(chain, open_ledger):
+    hashes = [clip_hash() for _ in range(6)]
+    for h in hashes[:5]:
+        chain.mine(h)
+    ledger = open_ledger()
+
+    assert ledger.sync(batch_blocks=2) == 5
+    assert chain.get_logs_calls == [(0, 1), (2, 3), (4, 5)]
+
+    chain.mine(hashes[5])
+    chain.mine()
+    chain.get_logs_calls.clear()
+    assert ledger.sync(batch_blocks=2) == 1
+    assert chain.get_logs_calls == [(6, 7)]
+
+    reopened = open_ledger()
+    assert [e["hash"] for e in reopened.entries] == hashes
+    assert reopened.last_block == 7
+    assert reopened.verify_chain() == {"ok": True, "anchored": True, "entries": 6,
+                                       "head": reopened.entries[-1]["link"], "last_block": 7}
+
+
+def test_sync_max_age_skips_rpc(chain, open_ledger):
+    chain.mine(clip_hash())
+    ledger = open_ledger()
+    ledger.sync()
+    chain.mine(clip_hash())
+    chain.get_logs_calls.clear()
+
+    assert ledger.sync(max_age=60) == 0
+    assert chain.get_logs_calls == []
+    assert ledger.sync() == 1
+
+
+def test_verify_chain_reports_edited_entry(chain, open_ledger):
+    for _ in range(4):
+        chain.mine(clip_hash())
+    ledger = open_ledger()
+    ledger.sync()
+
+    with open(ledger.path) as f:
+        lines = [json.loads(line) for line in f]
+    lines[2]["hash"] = clip_hash()
+    with open(ledger.path, "w") as f:
+        f.writelines(json.dumps(e) + "\n" for e in lines)
+
+    assert open_ledger().verify_chain(anchor=False) == {"ok": False, "entries": 4, "broken_at": 2}
+
+
+def test_verify_chain_anchor_detects_wrong_head(chain, open_ledger):
+    chain.mine(clip_hash())
+    ledger = open_ledger()
+    ledger.sync()
+    chain.logs[-1]["args"]["hash"] = bytes.fromhex(clip_hash())
+
+    result = ledger.verify_chain()
+    assert result["anchored"] is False and result["ok"] is False
+
+
+@pytest.mark.parametrize("change", ["chain_id", "contract", "block_hash", "head_behind"])
+def test_check_chain_resets_when_the_chain_changes(chain, open_ledger, change):
+    for _ in range(3):
+        chain.mine(clip_hash())
+    ledger = open_ledger()
+    ledger.sync()
+    assert ledger.check_chain() is False
+
+    if change == "chain_id":
+        chain.chain_id += 1
+    elif change == "contract":
+        chain.address = "0x00000000000000000000000000000000000000Bb"
+    elif change == "block_hash":      # Ganache restarted and mined to the same height
+        chain.block_hashes = [os.urandom(32) for _ in chain.block_hashes]
+    else:
+        del chain.block_hashes[2:]
+
+    reopened = open_ledger()
+    assert reopened.check_chain() is True
+    assert reopened.entries == [] and reopened.binding is None
+    assert not os.path.exists(reopened.path)
+    assert any(".stale-" in name for name in os.listdir(os.path.dirname(reopened.path)))
+
+    chain.logs = [log for log in chain.logs if log["blockNumber"] <= chain.block_number]
+    assert reopened.sync() == len(chain.logs)
+    assert reopened.check_chain() is False
+
+
+def test_verify_records_statuses(chain, open_ledger, tmp_path):
+    def enc_file(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path), hashlib.sha256(data).hexdigest()
+
+    good, good_hash = enc_file("good.enc", b"good")
+    wrong_tx, wrong_tx_hash = enc_file("tx.enc", b"tx")
+    missing, missing_hash = enc_file("missing.enc", b"missing")
+    edited, edited_hash = enc_file("edited.enc", b"edited")
+    chain.mine(good_hash, wrong_tx_hash, missing_hash, edited_hash)
+    ledger = open_ledger()
+    ledger.sync()
+
+    os.remove(missing)
+    with open(edited, "ab") as f:
+        f.write(b"!")
+    records = [
+        {"hash": good_hash, "enc_path": good, "tx_hash": "0x" + ledger.lookup(good_hash)["tx_hash"]},
+        {"hash": clip_hash(), "enc_path": good},
+        {"hash": wrong_tx_hash, "enc_path": wrong_tx, "tx_hash": clip_hash()},
+        {"hash": missing_hash, "enc_path": missing},
+        {"hash": edited_hash, "enc_path": edited},
+    ]
+
+    statuses = [r["status"] for r in ledger.verify_records(records)]
+    assert statuses == ["verified", "not_on_chain", "tx_mismatch", "missing_file", "file_mismatch"]
+    assert [r["status"] for r in ledger.verify_records(records, check_files=False)][3:] == ["verified", "verified"]